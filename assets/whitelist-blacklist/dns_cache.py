@@ -0,0 +1,82 @@
+import asyncio
+import ipaddress
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+# DNS预解析 2026-10-18
+# 检测前把所有候选url的host去重后并发解析一次，结果在本次运行内缓存：
+# 解析成功的地址直接用于建立连接，不再每个url各自解析；与 socket.create_connection 一样按顺序逐个尝试所有地址
+# （先返回IPv6地址而本机没有IPv6、或有多条A记录其中部分不通时，仍能连上）；
+# 域名不存在（NXDOMAIN）的url直接判失败，不占检测并发也不等超时。
+# 临时错误（超时、EAI_AGAIN 等）不缓存，交给正常检测处理。
+
+# 表示域名不存在的 getaddrinfo 错误码
+NEGATIVE_ERRORS = {socket.EAI_NONAME}
+if hasattr(socket, 'EAI_NODATA'):
+    NEGATIVE_ERRORS.add(socket.EAI_NODATA)
+
+class HostNotFound(OSError):
+    pass
+
+def is_ip_address(host):
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+class DNSCache:
+    """
+    Resolve host names once per run.
+
+    :param workers: Concurrent lookups (getaddrinfo blocks, so each lookup takes a thread)
+    :param timeout: Timeout of one lookup (seconds)
+    """
+    def __init__(self, workers=64, timeout=5):
+        self.workers = workers
+        self.timeout = timeout
+        self.addresses = {}  # host -> 解析到的IP列表（去重，保持 getaddrinfo 的顺序）
+        self.not_found = {}  # host -> HostNotFound
+
+    async def resolve_all(self, hosts):
+        hosts = {host for host in hosts if host and not is_ip_address(host)
+                 and host not in self.addresses and host not in self.not_found}
+        if not hosts:
+            return
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        async def resolve(host):
+            try:
+                infos = await asyncio.wait_for(
+                    loop.run_in_executor(executor, socket.getaddrinfo, host, None, 0, socket.SOCK_STREAM),
+                    self.timeout)
+                self.addresses[host] = list(dict.fromkeys(info[4][0] for info in infos))
+            except socket.gaierror as e:
+                if e.errno in NEGATIVE_ERRORS:
+                    self.not_found[host] = HostNotFound(f"DNS lookup failed for {host}: {e.strerror}")
+            except (asyncio.TimeoutError, OSError, UnicodeError):
+                pass
+
+        try:
+            await asyncio.gather(*(resolve(host) for host in hosts))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def address_list(self, host):
+        """
+        :return: The cached addresses of host, or [host] when it was not resolved in advance
+        """
+        return self.addresses.get(host) or [host]
+
+    async def open_connection(self, host, port, **kwargs):
+        """
+        asyncio.open_connection trying each cached address of host in order.
+        """
+        error = None
+        for address in self.address_list(host):
+            try:
+                return await asyncio.open_connection(address, port, **kwargs)
+            except OSError as e:
+                error = e
+        raise error
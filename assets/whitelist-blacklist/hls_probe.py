@@ -0,0 +1,142 @@
+import re
+import time
+from collections import namedtuple
+from urllib.parse import urljoin, urlsplit
+
+# HLS 深度检测 2026-10-18
+# 只看响应头无法知道 m3u8 能不能流畅播放：这里解析主/媒体播放列表，
+# 取码率最低的一路下载一个分片的开头部分，用下载速度和标称码率比较，结果写入 hls_probe.txt。
+# 检测时带宽由大量并发检测共享，测出的速度偏低，默认不按 ratio 判失败（见 ProbeEngine 的 hls_strict）。
+
+# 下载速度 / 标称码率 的最低要求，1.0 表示刚好够实时播放
+HLS_MIN_RATIO = 1.0
+# 播放列表的最大长度，超过不再下载
+PLAYLIST_LIMIT = 1024 * 1024
+# 分片只下载开头这么多字节来测速
+SEGMENT_LIMIT = 256 * 1024
+# 主播放列表最多跟随的层数
+MAX_PLAYLIST_DEPTH = 3
+
+# 检测结果：bandwidth 标称码率(bps)，resolution 分辨率，target_duration 分片目标时长(秒)，
+# throughput 实测下载速度(bps)，ratio = throughput / bandwidth
+HLSInfo = namedtuple('HLSInfo', ['bandwidth', 'resolution', 'target_duration', 'throughput', 'ratio'])
+
+# BANDWIDTH=1280000,RESOLUTION=1280x720,CODECS="avc1.4d401f,mp4a.40.2"
+HLS_ATTR_RE = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+# audio/x-mpegurl 等也常用于普通 m3u 频道列表，不算作 HLS
+HLS_CONTENT_TYPES = ('application/vnd.apple.mpegurl', 'application/x-mpegurl')
+
+class HLSError(Exception):
+    pass
+
+def is_hls(url, content_type=''):
+    """
+    Guess whether the url is an HLS playlist from its path or content type.
+    """
+    return '.m3u8' in urlsplit(url).path.lower() or content_type.split(';')[0].strip().lower() in HLS_CONTENT_TYPES
+
+def parse_hls_attrs(text):
+    return {key: value.strip('"') for key, value in HLS_ATTR_RE.findall(text)}
+
+def parse_m3u8(text, base_url):
+    """
+    Parse a master or media playlist.
+
+    :return: (variants, target_duration, segments)
+        variants: list of (bandwidth, resolution, absolute uri), empty for a media playlist
+        target_duration: EXT-X-TARGETDURATION in seconds or None
+        segments: list of (duration, absolute uri)
+    """
+    variants = []
+    segments = []
+    target_duration = None
+    stream_inf = None
+    duration = None
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith('#EXT-X-STREAM-INF:'):
+            stream_inf = parse_hls_attrs(line[len('#EXT-X-STREAM-INF:'):])
+        elif line.startswith('#EXT-X-TARGETDURATION:'):
+            try:
+                target_duration = float(line[len('#EXT-X-TARGETDURATION:'):])
+            except ValueError:
+                pass
+        elif line.startswith('#EXTINF:'):
+            try:
+                duration = float(line[len('#EXTINF:'):].split(',')[0])
+            except ValueError:
+                duration = None
+        elif line[0] == '#':
+            continue
+        elif stream_inf is not None:
+            bandwidth = stream_inf.get('BANDWIDTH', '')
+            variants.append((int(bandwidth) if bandwidth.isdigit() else None,
+                             stream_inf.get('RESOLUTION', ''), urljoin(base_url, line)))
+            stream_inf = None
+        else:
+            segments.append((duration, urljoin(base_url, line)))
+            duration = None
+    return variants, target_duration, segments
+
+async def fetch(pool, url, limit, truncate=False):
+    """
+    GET the url following redirects and return (final url, body, response headers).
+
+    :param truncate: Keep the first limit bytes of a larger body instead of failing
+    """
+    for _ in range(5):
+        status, reason, response_headers, body = await pool.request(url, 'GET', body_limit=limit, truncate=truncate)
+        if status in (301, 302, 303, 307, 308) and 'location' in response_headers:
+            url = urljoin(url, response_headers['location'])
+            continue
+        if status >= 400:
+            raise HLSError(f"HTTP Error {status}: {reason} ({url})")
+        return url, body, response_headers
+    raise HLSError(f"Too many redirects ({url})")
+
+async def probe_hls(pool, url):
+    """
+    Download the playlist and one segment of the lowest bandwidth variant.
+
+    :return: HLSInfo, or None if the url turns out not to be an HLS playlist or its bitrate is unknown
+    """
+    bandwidth = None
+    resolution = ''
+    for _ in range(MAX_PLAYLIST_DEPTH):
+        url, body, _ = await fetch(pool, url, PLAYLIST_LIMIT)
+        text = body.decode('utf-8', errors='replace')
+        if '#EXT-X-' not in text and '#EXTINF' not in text:
+            return None
+        variants, target_duration, segments = parse_m3u8(text, url)
+        if not variants:
+            break
+        # 码率最低的一路最容易流畅播放，没有标称码率的排在最后
+        bandwidth, resolution, url = min(variants, key=lambda variant: (variant[0] is None, variant[0] or 0))
+    else:
+        raise HLSError("nested master playlists")
+    if not segments:
+        raise HLSError("no segments in media playlist")
+
+    # 直播列表最后一个分片最新，不会马上过期
+    duration, segment_url = segments[-1]
+    start_time = time.time()
+    _, segment, response_headers = await fetch(pool, segment_url, SEGMENT_LIMIT, truncate=True)
+    elapsed = max(time.time() - start_time, 1e-6)
+    if not segment:
+        raise HLSError("empty segment")
+    throughput = len(segment) * 8 / elapsed
+
+    duration = duration or target_duration
+    if bandwidth is None and duration:
+        # 媒体列表没有标称码率时，用分片大小和时长估算；只下载了开头时分片大小取 Content-Length
+        segment_size = len(segment)
+        if segment_size >= SEGMENT_LIMIT:
+            content_length = response_headers.get('content-length', '')
+            segment_size = int(content_length) if content_length.isdigit() else 0
+        bandwidth = segment_size * 8 / duration
+    if not bandwidth:
+        return None
+    return HLSInfo(bandwidth, resolution, target_duration, throughput, throughput / bandwidth)
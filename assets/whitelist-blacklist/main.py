@@ -1,11 +1,48 @@
-import urllib.request
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import time
 from datetime import datetime, timedelta, timezone
 import os
 from urllib.parse import urlparse
 import socket  #check p3p源 rtp源
 import subprocess #check rtmp源
+import sys
+import threading
+
+# 获取当前脚本所在的目录
+current_dir = os.path.dirname(os.path.abspath(__file__))
+# 获取上一层目录
+parent_dir = os.path.dirname(current_dir)
+# 获取再上一层目录
+parent2_dir = os.path.dirname(parent_dir)
+
+# 与根目录的main.py共用上游下载模块
+sys.path.insert(0, parent2_dir)
+from fetcher import fetch_all, FetchCache
+from m3u_parser import parse_channel_lines, PARSER_VERSION
+from probe_engine import ProbeEngine
+from probe_history import ProbeHistory
+from probe_metrics import ProbeMetrics
+from url_snapshot import write_snapshot, file_digest
+from url_key import canonical_url
+
+# 检测设置：同时进行的检测数上限、单个host的并发数、HTTP检测方式
+# PROBE_MODE: 'light' 先HEAD，不支持时 GET+Range，复用keep-alive连接；'get' 与原来一致的GET
+PROBE_MAX_IN_FLIGHT = 1000
+PROBE_PER_HOST = 8
+PROBE_MODE = 'light'
+# HLS深度检测：m3u8源再下载一个分片的开头测速，结果写入 hls_probe.txt；超时(秒)
+# 深度检测单独限制并发数，不与上千个普通检测分带宽；
+# PROBE_HLS_STRICT 为True时下载速度达不到实时播放的不进白名单（只建议在带宽充足、并发低的机器上打开）
+PROBE_HLS_DEEP = True
+PROBE_HLS_TIMEOUT = 15
+PROBE_HLS_CONCURRENCY = 8
+PROBE_HLS_STRICT = False
+# 熔断：每个host先抽样检测的url数（0为关闭），连续连不上多少次后该host其余url直接判失败
+PROBE_CIRCUIT_SAMPLE = 3
+PROBE_CIRCUIT_THRESHOLD = 5
+# rtsp/rtmp 在引擎内做协议握手检测；设为True时握手通过后再用ffprobe确认（需要安装ffmpeg）
+PROBE_FFPROBE_DEEP = False
+# 检测历史：只重测可信度已过期的url；设置环境变量 IPTV_PROBE_ALL=1 时全部重测
+PROBE_HISTORY_DB = os.path.join(current_dir, 'probe_history.db')
+PROBE_ALL = os.environ.get('IPTV_PROBE_ALL') == '1'
 
 timestart = datetime.now()
 
@@ -35,43 +72,18 @@ def read_txt_file(file_path):
         ]
     return lines
 
-# 检测URL是否可访问并记录响应时间
-def check_url(url, timeout=6):
-    start_time = time.time()
-    elapsed_time = None
-    success = False
-
-    # 将 URL 中的汉字编码
-    encoded_url = urllib.parse.quote(url, safe=':/?&=')
-    
-    try:
-        if url.startswith("http"):
-            headers = {
-                'User-Agent': 'PostmanRuntime-ApipostRuntime/1.1.0',
-            }
-            req = urllib.request.Request(encoded_url, headers=headers)
-            with urllib.request.urlopen(req, timeout=timeout) as response:
-                if response.status == 200:
-                    success = True
-        elif url.startswith("p3p"):
-            success = check_p3p_url(url, timeout)
-        elif url.startswith("p2p"):
-            success = check_p2p_url(url, timeout)        
-        elif url.startswith("rtmp") or url.startswith("rtsp") :
-            success = check_rtmp_url(url, timeout)
-        elif url.startswith("rtp"):
-            success = check_rtp_url(url, timeout)
-
-        # 如果执行到这一步，没有异常，计算时间
-        elapsed_time = (time.time() - start_time) * 1000  # 转换为毫秒
-
-    except Exception as e:
-        print(f"Error checking {url}: {e}")
-        record_host(get_host_from_url(url))
-        # 在发生异常的情况下，将 elapsed_time 设置为 None
-        elapsed_time = None
-
-    return elapsed_time, success
+# 非http源的检测，异步引擎中放在线程池里执行
+# rtsp/rtmp 由引擎原生握手检测，这里的 ffprobe 只在 PROBE_FFPROBE_DEEP 时作为深度检测 2026-10-18
+def check_non_http_url(url, timeout):
+    if url.startswith("p3p"):
+        return check_p3p_url(url, timeout)
+    elif url.startswith("p2p"):
+        return check_p2p_url(url, timeout)
+    elif url.startswith("rtmp") or url.startswith("rtsp") :
+        return check_rtmp_url(url, timeout)
+    elif url.startswith("rtp"):
+        return check_rtp_url(url, timeout)
+    return False
 
 def check_rtmp_url(url, timeout):
     try:
@@ -165,39 +177,64 @@ def check_p2p_url(url, timeout):
         print(f"Error checking {url}: {e}")
     return False
 
-# 处理单行文本并检测URL
-def process_line(line, whitelist): 
-    if "#genre#" in line or "://" not in line :
-        return None, None  # 跳过包含“#genre#”的行
-    line=line.strip()
-    parts = line.split(',')
-    if len(parts) == 2:
-        name, url = parts
-        # 白名单判断
-        if url in whitelist:
-            return 0, line
-        # 请求验证
-        elapsed_time, is_valid = check_url(url)
-        if is_valid:
-            return elapsed_time, line
-        else:
-            return None, line
-    return None, None
-
-# 多线程处理文本并检测URL
-def process_urls_multithreaded(lines, whitelist, max_workers=30):
+# asyncio检测引擎处理文本并检测URL，替代原来30个线程的多线程检测 2026-10-18
+def process_urls_async(lines, whitelist, max_in_flight=PROBE_MAX_IN_FLIGHT, per_host=PROBE_PER_HOST, mode=PROBE_MODE,
+                       hls_deep=PROBE_HLS_DEEP, history=None, metrics=None):
     blacklist =  [] 
     successlist = []
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(process_line, line, whitelist): line for line in lines}
-        for future in as_completed(futures):
-            elapsed_time, result = future.result()
-            if result:
-                if elapsed_time is not None:
-                    successlist.append(f"{elapsed_time:.2f}ms,{result}")
-                else:
-                    blacklist.append(result)
+    probe_lines = []
+
+    for line in lines:
+        if "#genre#" in line or "://" not in line :
+            continue  # 跳过包含“#genre#”的行
+        line=line.strip()
+        parts = line.split(',')
+        if len(parts) == 2:
+            name, url = parts
+            # 白名单判断（白名单为规范化后的url）
+            if canonical_url(url) in whitelist:
+                successlist.append(f"{0:.2f}ms,{line}")
+            else:
+                probe_lines.append((line, url))
+
+    # 请求验证
+    engine = ProbeEngine(check_non_http_url, timeout=6, max_in_flight=max_in_flight, per_host=per_host, mode=mode,
+                         hls_deep=hls_deep, hls_timeout=PROBE_HLS_TIMEOUT, hls_concurrency=PROBE_HLS_CONCURRENCY,
+                         hls_strict=PROBE_HLS_STRICT,
+                         circuit_sample=PROBE_CIRCUIT_SAMPLE, circuit_threshold=PROBE_CIRCUIT_THRESHOLD,
+                         stream_deep=PROBE_FFPROBE_DEEP, metrics=metrics)
+    probe_urls = list(dict.fromkeys(url for line, url in probe_lines))
+    fresh = {}  # 上次结果仍可信、本次不检测的url
+    if history is not None and not PROBE_ALL:
+        probe_urls, fresh = history.partition(probe_urls)
+        print(f"检测历史: 需要检测 {len(probe_urls)} 沿用上次结果 {len(fresh)}")
+    results = engine.run(probe_urls)
+    print(f"DNS预解析 成功: {len(engine.dns.addresses)} 域名不存在: {len(engine.dns.not_found)}")
+    print(f"熔断host数: {len(engine.open_hosts)} 跳过url数: {sum(engine.open_hosts.values())}")
+    if history is not None:
+        history.record(results, [url for line, url in probe_lines])
+    for line, url in probe_lines:
+        if url in fresh:
+            _, success_streak, _, ewma_latency, last_error = fresh[url]
+            if last_error is not None:
+                record_host(get_host_from_url(url))
+            if success_streak:
+                successlist.append(f"{ewma_latency:.2f}ms,{line}")
+            else:
+                blacklist.append(line)
+            continue
+        result = results[url]
+        if result.error is not None:
+            print(f"Error checking {url}: {result.error}")
+            record_host(get_host_from_url(url))
+        if result.hls is not None:
+            hls = result.hls
+            hls_statistics.append(f"{result.elapsed_time:.2f}ms,{hls.ratio:.2f}x,{hls.bandwidth:.0f},"
+                                  f"{hls.resolution},{line}")
+        if result.success:
+            successlist.append(f"{result.elapsed_time:.2f}ms,{line}")
+        else:
+            blacklist.append(line)
     return successlist, blacklist
 
 # 写入文件
@@ -210,75 +247,39 @@ def write_list(file_path, data_list):
 # urls里所有的源都读到这里。
 urls_all_lines = []
 
-#M3U格式判断
-def is_m3u_content(text):
-    lines = text.splitlines()
-    first_line = lines[0].strip()
-    return first_line.startswith("#EXTM3U")
-
-def convert_m3u_to_txt(m3u_content):
-    # 分行处理
-    lines = m3u_content.split('\n')
-    
-    # 用于存储结果的列表
-    txt_lines = []
-    
-    # 临时变量用于存储频道名称
-    channel_name = ""
-    
-    for line in lines:
-        # 过滤掉 #EXTM3U 开头的行
-        if line.startswith("#EXTM3U"):
-            continue
-        # 处理 #EXTINF 开头的行
-        if line.startswith("#EXTINF"):
-            # 获取频道名称
-            channel_name = line.split(',')[-1].strip()
-        # 处理 URL 行
-        elif line.startswith("http"):
-            txt_lines.append(f"{channel_name},{line.strip()}")
-
-    return txt_lines
-
 url_statistics=[]
 
-def process_url(url):
+# HLS深度检测结果：响应时间,下载速度/码率,码率,分辨率,频道名,url
+hls_statistics=[]
+
+# 下载改为fetch_all并发完成，并使用上游缓存（与根目录main.py共用） 2026-10-18
+def process_url(url, body, error=None):
     try:
-        # 打开URL并读取内容
-        headers = {
-            'User-Agent': 'PostmanRuntime-ApipostRuntime/1.1.0',
-        }
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=10) as response:
-            # 以二进制方式读取数据
-            data = response.read()
-            # 将二进制数据解码为字符串
-            text = data.decode('utf-8')
-            if is_m3u_content(text):
-                m3u_lines=convert_m3u_to_txt(text)
-                url_statistics.append(f"{len(m3u_lines)},{url.strip()}")
-                urls_all_lines.extend(m3u_lines) # 注意：extend
-            else:
-                lines = text.split('\n')
-                url_statistics.append(f"{len(lines)},{url.strip()}")
-                for line in lines:
-                    if  "#genre#" not in line and "," in line and "://" in line:
-                        urls_all_lines.append(line.strip())
+        if error is not None:
+            raise error
+        line_count = 0
+        # 上游内容整理成 频道名,url 行，m3u和txt统一由m3u_parser解析（解码由fetcher.iter_lines流式完成）
+        for line in fetch_cache.parsed_lines(url, body, f'checker-v{PARSER_VERSION}', parse_channel_lines):
+            line_count += 1
+            if  "#genre#" not in line and "," in line and "://" in line:
+                urls_all_lines.append(line.strip())
+        url_statistics.append(f"{line_count},{url.strip()}")
     
     except Exception as e:
         print(f"处理URL时发生错误：{e}")
 
 
 # 去重复源 2024-08-06 (检测前剔除重复url，提高检测效率)
+# 按规范化后的url去重，集合查找代替列表查找（原来是O(n²)） 2026-10-18
 def remove_duplicates_url(lines):
-    urls =[]
+    urls = set()
     newlines=[]
     for line in lines:
         if "," in line and "://" in line:
             # channel_name=line.split(',')[0].strip()
-            channel_url=line.split(',')[1].strip()
-            if channel_url not in urls: # 如果发现当前url不在清单中，则假如newlines
-                urls.append(channel_url)
+            url_key=canonical_url(line.split(',')[1])
+            if url_key not in urls: # 如果发现当前url不在清单中，则假如newlines
+                urls.add(url_key)
                 newlines.append(line)
     return newlines
 
@@ -326,31 +327,29 @@ def get_host_from_url(url: str) -> str:
         return f"Error: {str(e)}"
 
 # 使用字典来统计blackhost的记录次数
+# 可能在多个线程中调用，加锁计数 2026-10-18
 blacklist_dict = {}
+blacklist_dict_lock = threading.Lock()
 def record_host(host):
-    # 如果 host 已经在字典中，计数加 1
-    if host in blacklist_dict:
-        blacklist_dict[host] += 1
-    # 如果 host 不在字典中，加入并初始化计数为 1
-    else:
-        blacklist_dict[host] = 1
+    with blacklist_dict_lock:
+        # 如果 host 已经在字典中，计数加 1
+        if host in blacklist_dict:
+            blacklist_dict[host] += 1
+        # 如果 host 不在字典中，加入并初始化计数为 1
+        else:
+            blacklist_dict[host] = 1
         
 if __name__ == "__main__":
     # 自定义源
     urls = read_txt_to_array('assets/urls.txt')
     # urls = ['https://raw.githubusercontent.com/YanG-1989/m3u/main/Gather.m3u']
     
-    for url in urls:
-        if url.startswith("http"):
-            print(f"处理URL: {url}")
-            process_url(url)   #读取上面url清单中直播源存入urls_all_lines
+    fetch_urls = [url for url in urls if url.startswith("http")]
+    fetch_cache = FetchCache(os.path.join(parent2_dir, '.cache/upstream'), offline=os.environ.get('IPTV_OFFLINE') == '1')
+    for url, body, error in fetch_all(fetch_urls, timeout=10, cache=fetch_cache):
+        print(f"处理URL: {url}")
+        process_url(url, body, error)   #读取上面url清单中直播源存入urls_all_lines
             
-    # 获取当前脚本所在的目录
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    # 获取上一层目录
-    parent_dir = os.path.dirname(current_dir)
-    # 获取再上一层目录
-    parent2_dir = os.path.dirname(parent_dir)
     # # 获取根目录
     # root_dir = os.path.abspath(os.sep)  
 
@@ -387,9 +386,12 @@ if __name__ == "__main__":
     # 先使用列表推导式提取逗号后的内容，同时可以添加更多的条件判断和处理逻辑
     extracted_parts = [white_line.split(',')[1].strip() if ',' in white_line and len(white_line.split(',')) >= 2 else "" for white_line in lines_whitelist]
     # 再将提取出来的内容构建成集合，利用集合去重等特性（如果有需要的话）
-    white_line_parts_set = set(extracted_parts)
+    white_line_parts_set = {canonical_url(part) for part in extracted_parts if part}
     # 处理URL并生成成功清单和黑名单
-    successlist, blacklist = process_urls_multithreaded(set(lines), white_line_parts_set)
+    history = ProbeHistory(PROBE_HISTORY_DB)
+    metrics = ProbeMetrics()
+    successlist, blacklist = process_urls_async(set(lines), white_line_parts_set, history=history, metrics=metrics)
+    history.close()
     
     # 给successlist, blacklist排序
     # 定义排序函数
@@ -438,11 +440,22 @@ if __name__ == "__main__":
 
     # 写入黑名单文件
     write_list(blacklist_file, blacklist)
+    # 黑名单快照，main.py 用 mmap 查找，不再解析整个 txt 2026-10-18
+    blacklist_snapshot_file = os.path.join(current_dir, 'blacklist_auto.bin')
+    write_snapshot(blacklist_snapshot_file, [line.split(',')[1].strip() for line in blacklist if ',' in line],
+                   file_digest(blacklist_file))
 
     print(f"成功清单文件已生成: {success_file}")
     print(f"成功清单文件已生成(tv): {success_file_tv}")
     print(f"黑名单文件已生成: {blacklist_file}")
 
+    # HLS深度检测结果，按下载速度/码率从高到低
+    hls_file = os.path.join(current_dir, 'hls_probe.txt')
+    hls_statistics.sort(key=lambda item: -float(item.split(',')[1].replace('x', '')))
+    write_list(hls_file, ["更新时间,#genre#"] + [version] + ['\n'] +
+               ["RespoTime,Ratio,Bandwidth,Resolution,hls,#genre#"] + hls_statistics)
+    print(f"HLS检测结果已生成: {hls_file}")
+
     # 执行的代码
     timeend = datetime.now()
 
@@ -476,6 +489,13 @@ if __name__ == "__main__":
         print(f"结果已保存到 {filename}")
 
     save_blackhost_to_txt()
+
+    # 检测指标：JSON 和 Prometheus 文本格式
+    metrics_json_file = os.path.join(current_dir, "probe_metrics.json")
+    metrics_prom_file = os.path.join(current_dir, "probe_metrics.prom")
+    metrics.write_json(metrics_json_file)
+    metrics.write_prometheus(metrics_prom_file)
+    print(f"检测指标已保存到 {metrics_json_file} {metrics_prom_file}")
             
     for statistics in url_statistics: #查看各个url的量有多少 2024-08-19
         print(statistics)
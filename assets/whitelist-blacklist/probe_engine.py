@@ -0,0 +1,424 @@
+import asyncio
+import ssl
+import time
+import urllib.parse
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urljoin
+from hls_probe import HLS_MIN_RATIO, HLSError, is_hls, probe_hls
+from dns_cache import DNSCache
+from stream_probe import is_native_stream, probe_stream
+
+# asyncio 检测引擎 2026-10-18
+# 用协程代替每个url占一个线程，可以同时保持上千个检测在进行；
+# 同一个 host 限制并发数，避免把单个源站打挂。
+# 结果与 check_url 一致：(elapsed_time 毫秒, success)，出错时 elapsed_time 为 None。
+
+headers = {
+    'User-Agent': 'PostmanRuntime-ApipostRuntime/1.1.0',
+}
+
+# 检测结果：error 为出错时的异常（与原 check_url 中进入 except 分支一致）
+# hls 为 HLS 深度检测结果（HLSInfo），未做深度检测时为 None
+ProbeResult = namedtuple('ProbeResult', ['elapsed_time', 'success', 'error', 'hls'], defaults=(None,))
+
+class HTTPStatusError(Exception):
+    def __init__(self, status, reason):
+        super().__init__(f"HTTP Error {status}: {reason}")
+        self.status = status
+
+class HostCircuitOpen(Exception):
+    pass
+
+# 熔断 2026-10-18
+# 同一个 host 的url先抽样检测几条，样本全部连不上（超时、拒绝连接、DNS失败等）就判定 host 不可达，
+# 其余url直接判失败，不再逐个等超时；样本正常的 host 全部检测，
+# 检测中连续 circuit_threshold 次连不上同样熔断。HTTP 返回码错误说明 host 可达，不计入。
+def is_connection_failure(error):
+    return isinstance(error, (TimeoutError, OSError)) and not isinstance(error, HostCircuitOpen)
+
+MAX_REDIRECTS = 5
+# 响应头最大长度，超过视为异常
+MAX_HEADER_SIZE = 64 * 1024
+
+ssl_context = ssl.create_default_context()
+
+async def read_response_head(reader):
+    """
+    Read the status line and headers.
+
+    :return: (status, reason, headers dict with lower-case keys)
+    """
+    status_line = (await reader.readline()).decode('iso-8859-1').strip()
+    parts = status_line.split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith('HTTP/') or not parts[1].isdigit():
+        raise ValueError(f"Bad status line: {status_line!r}")
+    status = int(parts[1])
+    reason = parts[2] if len(parts) > 2 else ''
+    version = parts[0]
+    response_headers = {}
+    size = 0
+    while True:
+        line = await reader.readline()
+        size += len(line)
+        if size > MAX_HEADER_SIZE:
+            raise ValueError("Response header too large")
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, _, value = line.decode('iso-8859-1').partition(':')
+        response_headers[key.strip().lower()] = value.strip()
+    if version == 'HTTP/1.0' and response_headers.get('connection', '').lower() != 'keep-alive':
+        response_headers['connection'] = 'close'  # HTTP/1.0 默认不保持连接
+    return status, reason, response_headers
+
+class BodyTooLarge(Exception):
+    pass
+
+async def read_body(reader, method, status, response_headers, limit, keep_alive, truncate=False):
+    """
+    Read a whole response body (content-length, chunked or until close).
+
+    :param truncate: Return the first limit bytes of a larger body (and drop the connection) instead of raising
+    :return: (body, keep_alive)
+    """
+    if method == 'HEAD' or status in (204, 304):
+        return b'', keep_alive
+    if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        size = 0
+        while True:
+            chunk_size = int((await reader.readline()).split(b';')[0].strip() or b'0', 16)
+            if chunk_size == 0:
+                # 跳过 trailer
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                return b''.join(chunks), keep_alive
+            if size + chunk_size > limit:
+                if not truncate:
+                    raise BodyTooLarge(f"body larger than {limit} bytes")
+                chunks.append(await reader.readexactly(limit - size))
+                return b''.join(chunks), False
+            size += chunk_size
+            chunks.append(await reader.readexactly(chunk_size))
+            await reader.readline()
+    if response_headers.get('content-length', '').isdigit():
+        length = int(response_headers['content-length'])
+        if length > limit:
+            if not truncate:
+                raise BodyTooLarge(f"body larger than {limit} bytes")
+            return await reader.readexactly(limit), False
+        return await reader.readexactly(length), keep_alive
+    body = b''
+    while not reader.at_eof() and len(body) <= limit:
+        body += await reader.read(limit + 1 - len(body))
+    if len(body) > limit:
+        if not truncate:
+            raise BodyTooLarge(f"body larger than {limit} bytes")
+        return body[:limit], False
+    return body, False
+
+# 连接池 2026-10-18
+# 同一个 host:port 的检测复用 keep-alive 连接（含TLS握手），
+# 只要状态行和响应头到达就判断结果；能复用的连接放回池里，其余立即关闭，不下载正文。
+# 检测方式：
+#   'get'   与原来一致，GET 后只读响应头
+#   'light' 先发 HEAD；HEAD 返回错误码或连接异常（有的服务器对 HEAD 返回 403/404 或直接断开）时
+#           再发 GET + Range: bytes=0-0，以 GET 的结果为准
+PROBE_MODES = ('get', 'light')
+
+# 可以复用连接时，最多读取并丢弃的正文长度
+DRAIN_LIMIT = 16 * 1024
+# 服务器不支持 HEAD 时的返回码，这些 host 之后直接发 GET
+HEAD_NOT_ALLOWED = (400, 405, 501)
+# HEAD 的这些异常（状态行异常、连接被重置）改用 GET 重试；连接超时、拒绝连接等不重试
+HEAD_FAILURES = (ValueError, asyncio.IncompleteReadError, ConnectionResetError, ConnectionAbortedError,
+                 BrokenPipeError)
+
+class HTTPConnectionPool:
+    def __init__(self, dns=None):
+        self.idle = {}  # (scheme, host, port) -> [(reader, writer), ...]
+        self.head_not_allowed = set()  # 不支持 HEAD 的 host:port
+        self.dns = dns if dns is not None else DNSCache()
+
+    async def _connect(self, key):
+        scheme, host, port = key
+        https = scheme == 'https'
+        # 用预解析的地址连接，TLS 仍按域名校验证书
+        return await self.dns.open_connection(host, port, ssl=ssl_context if https else None,
+                                              server_hostname=host if https else None)
+
+    def _release(self, key, connection, reusable):
+        reader, writer = connection
+        if reusable and not reader.at_eof():
+            self.idle.setdefault(key, []).append(connection)
+        else:
+            writer.close()
+
+    async def request(self, url, method='GET', extra_headers=None, body_limit=None, truncate=False):
+        """
+        Send one request and return (status, reason, headers) as soon as the headers arrive.
+        The body is only read when it is small enough to keep the connection alive.
+
+        :param body_limit: Read the whole body (at most body_limit bytes) and return (status, reason, headers, body)
+        :param truncate: With body_limit, keep the first body_limit bytes of a larger body instead of failing
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        request_headers = dict(headers, Host=parts.netloc.rpartition('@')[2], Connection='keep-alive')
+        if extra_headers:
+            request_headers.update(extra_headers)
+        request = (f"{method} {path} HTTP/1.1\r\n" + ''.join(f"{k}: {v}\r\n" for k, v in request_headers.items())
+                   + "\r\n").encode('latin-1')
+
+        # 池里的连接可能已被服务器关闭，失败时换新连接重试一次
+        while self.idle.get(key):
+            connection = self.idle[key].pop()
+            try:
+                return await self._exchange(key, connection, request, method, body_limit, truncate)
+            except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+                connection[1].close()
+        return await self._exchange(key, await self._connect(key), request, method, body_limit, truncate)
+
+    async def _exchange(self, key, connection, request, method, body_limit=None, truncate=False):
+        reader, writer = connection
+        reusable = False
+        try:
+            writer.write(request)
+            await writer.drain()
+            status, reason, response_headers = await read_response_head(reader)
+            keep_alive = response_headers.get('connection', '').lower() != 'close'
+            if body_limit is not None:
+                body, keep_alive = await read_body(reader, method, status, response_headers, body_limit, keep_alive,
+                                                   truncate)
+                reusable = keep_alive
+                return status, reason, response_headers, body
+            if method == 'HEAD' or status in (204, 304):
+                pass
+            elif response_headers.get('content-length', '').isdigit() and \
+                    int(response_headers['content-length']) <= DRAIN_LIMIT:
+                await reader.readexactly(int(response_headers['content-length']))
+            else:
+                # 正文未知长度或较大（直播流），不读取，直接关闭
+                keep_alive = False
+            # 完整读完一个响应后才能放回池里（超时取消时连接直接关闭）
+            reusable = keep_alive
+            return status, reason, response_headers
+        finally:
+            self._release(key, connection, reusable)
+
+    def close(self):
+        for connections in self.idle.values():
+            for reader, writer in connections:
+                writer.close()
+        self.idle.clear()
+
+async def probe_http(pool, url, mode='light'):
+    """
+    :return: (success, final url after redirects, response headers)
+    """
+    # 将 URL 中的汉字编码（与原 check_url 相同）
+    current = urllib.parse.quote(url, safe=':/?&=')
+    for _ in range(MAX_REDIRECTS + 1):
+        host = urlsplit(current).netloc
+        head_ok = False
+        if mode == 'light' and host not in pool.head_not_allowed:
+            try:
+                status, reason, response_headers = await pool.request(current, 'HEAD')
+                head_ok = status < 400
+                if status in HEAD_NOT_ALLOWED:
+                    pool.head_not_allowed.add(host)
+            except HEAD_FAILURES:
+                pass
+        if mode == 'get':
+            status, reason, response_headers = await pool.request(current, 'GET')
+        elif not head_ok:
+            # HEAD 失败不直接判失败，只有 GET 也失败才抛出 HTTPStatusError
+            status, reason, response_headers = await pool.request(current, 'GET', {'Range': 'bytes=0-0'})
+        if status in (301, 302, 303, 307, 308) and 'location' in response_headers:
+            current = urljoin(current, response_headers['location'])
+            continue
+        if status >= 400:
+            raise HTTPStatusError(status, reason)
+        # Range 请求返回 206 同样说明资源可用
+        return status == 200 or (status == 206 and mode == 'light'), current, response_headers
+    raise HTTPStatusError(status, "Too many redirects")
+
+class ProbeEngine:
+    """
+    Run probes concurrently with a global cap and a per-host cap.
+
+    :param fallback_check: check(url, timeout) -> bool, run in a thread for the other schemes
+        (and for rtsp/rtmp after the native probe when stream_deep is set)
+    :param timeout: Timeout of one probe (seconds)
+    :param max_in_flight: Max probes in flight
+    :param per_host: Max concurrent probes per host:port
+    :param fallback_workers: Threads for the blocking fallback checks
+    :param mode: HTTP probe mode, one of PROBE_MODES
+    :param hls_deep: Download the start of one segment of HLS streams and measure the throughput
+    :param hls_timeout: Timeout of the HLS deep probe (seconds), not counting the wait for a slot
+    :param hls_concurrency: Max HLS deep probes in flight, outside the max_in_flight slots
+    :param hls_strict: Fail streams whose measured throughput is below HLS_MIN_RATIO; otherwise it is only reported
+    :param circuit_sample: URLs probed first on each host before the rest (0 disables the circuit breaker)
+    :param circuit_threshold: Consecutive connection failures that open the circuit of a host
+    :param stream_deep: Also run fallback_check (ffprobe) on rtsp/rtmp urls that passed the native handshake
+    :param metrics: Optional ProbeMetrics receiving the wall time of every probe
+    """
+    def __init__(self, fallback_check, timeout=6, max_in_flight=1000, per_host=8, fallback_workers=30, mode='light',
+                 hls_deep=False, hls_timeout=15, hls_concurrency=8, hls_strict=False, circuit_sample=3,
+                 circuit_threshold=5, stream_deep=False, metrics=None):
+        if mode not in PROBE_MODES:
+            raise ValueError(f"Unknown probe mode: {mode}")
+        self.mode = mode
+        self.hls_deep = hls_deep
+        self.hls_timeout = hls_timeout
+        self.hls_concurrency = hls_concurrency
+        self.hls_strict = hls_strict
+        self.circuit_sample = circuit_sample
+        self.circuit_threshold = circuit_threshold
+        self.stream_deep = stream_deep
+        self.metrics = metrics
+        self.open_hosts = {}  # 熔断的 host -> 直接判失败的url数
+        self.dns = DNSCache()
+        self.fallback_check = fallback_check
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.per_host = per_host
+        self.fallback_workers = fallback_workers
+
+    async def probe(self, url):
+        """
+        :return: (ProbeResult of the basic check, final url to deep probe or None)
+        """
+        start_time = time.time()
+        try:
+            if url.startswith("http"):
+                success, final_url, response_headers = await asyncio.wait_for(
+                    probe_http(self.pool, url, self.mode), self.timeout)
+            elif is_native_stream(url):
+                success = await asyncio.wait_for(probe_stream(url, self.dns), self.timeout)
+                if success and self.stream_deep:
+                    loop = asyncio.get_running_loop()
+                    success = await loop.run_in_executor(self.executor, self.fallback_check, url, self.timeout)
+            else:
+                loop = asyncio.get_running_loop()
+                success = await loop.run_in_executor(self.executor, self.fallback_check, url, self.timeout)
+            elapsed_time = (time.time() - start_time) * 1000  # 转换为毫秒
+        except asyncio.TimeoutError:
+            return ProbeResult(None, False, TimeoutError(f"timed out after {self.timeout}s")), None
+        except Exception as e:
+            return ProbeResult(None, False, e), None
+
+        if success and self.hls_deep and url.startswith("http") \
+                and is_hls(final_url, response_headers.get('content-type', '')):
+            return ProbeResult(elapsed_time, success, None), final_url
+        return ProbeResult(elapsed_time, success, None), None
+
+    async def probe_deep(self, result, hls_url):
+        """
+        HLS deep probe, at most hls_concurrency at a time so that the segment downloads
+        do not share the bandwidth with hundreds of other probes.
+        """
+        # 响应时间仍记录基础检测的耗时，深度检测结果单独保存
+        async with self.hls_slots:
+            try:
+                hls = await asyncio.wait_for(probe_hls(self.pool, hls_url), self.hls_timeout)
+            except asyncio.TimeoutError:
+                return ProbeResult(result.elapsed_time, False,
+                                   TimeoutError(f"HLS probe timed out after {self.hls_timeout}s"))
+            except Exception as e:
+                return ProbeResult(result.elapsed_time, False, e)
+        if hls is None:
+            return result
+        if self.hls_strict and hls.ratio < HLS_MIN_RATIO:
+            return ProbeResult(result.elapsed_time, False,
+                               HLSError(f"too slow for real-time playback ({hls.ratio:.2f}x)"), hls)
+        return ProbeResult(result.elapsed_time, True, None, hls)
+
+    def observe(self, url, result, duration_ms):
+        if self.metrics is not None:
+            self.metrics.observe(url, result, duration_ms)
+
+    async def _run(self, urls):
+        self.executor = ThreadPoolExecutor(max_workers=self.fallback_workers)
+        self.pool = HTTPConnectionPool(self.dns)
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        self.hls_slots = asyncio.Semaphore(self.hls_concurrency)
+        results = {}
+
+        hosts = {}
+        hostnames = {}
+        for url in urls:
+            try:
+                parts = urlsplit(url)
+                host, hostnames[url] = parts.netloc, parts.hostname
+            except ValueError:
+                host, hostnames[url] = '', None
+            hosts.setdefault(host, []).append(url)
+
+        # 先统一解析所有域名，域名不存在的url直接判失败
+        await self.dns.resolve_all(hostnames.values())
+        for host, host_urls in list(hosts.items()):
+            error = self.dns.not_found.get(hostnames[host_urls[0]])
+            if error is not None:
+                for url in host_urls:
+                    results[url] = ProbeResult(None, False, error)
+                    self.observe(url, results[url], 0)
+                del hosts[host]
+
+        async def host_worker(host, host_urls):
+            host_limit = asyncio.Semaphore(self.per_host)
+            failures = 0  # 连续连不上的次数
+            unreachable = set()  # 基础检测连不上的url
+
+            async def worker(url):
+                nonlocal failures
+                async with host_limit:
+                    if host in self.open_hosts:
+                        self.open_hosts[host] += 1
+                        results[url] = ProbeResult(None, False, HostCircuitOpen(f"host {host} is unreachable"))
+                        self.observe(url, results[url], 0)
+                        return
+                    start_time = time.time()
+                    async with in_flight:
+                        result, hls_url = await self.probe(url)
+                    # 熔断只看基础检测：深度检测超时或分片所在的CDN出错时，播放列表的 host 已经正常响应
+                    connection_failed = is_connection_failure(result.error)
+                    if connection_failed:
+                        unreachable.add(url)
+                    # 深度检测不占 in_flight 名额，由 hls_slots 单独限制
+                    if hls_url is not None:
+                        result = await self.probe_deep(result, hls_url)
+                    self.observe(url, result, (time.time() - start_time) * 1000)
+                results[url] = result
+                if connection_failed:
+                    failures += 1
+                    if self.circuit_sample and failures >= self.circuit_threshold:
+                        self.open_hosts.setdefault(host, 0)
+                else:
+                    failures = 0
+
+            # url少于样本数的 host 不必抽样
+            sample = host_urls[:self.circuit_sample] if len(host_urls) > self.circuit_sample else []
+            if sample:
+                await asyncio.gather(*(worker(url) for url in sample))
+                if all(url in unreachable for url in sample):
+                    self.open_hosts.setdefault(host, 0)
+            await asyncio.gather(*(worker(url) for url in host_urls[len(sample):]))
+
+        try:
+            await asyncio.gather(*(host_worker(host, host_urls) for host, host_urls in hosts.items()))
+        finally:
+            self.pool.close()
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    def run(self, urls):
+        """
+        Probe all urls.
+
+        :return: dict url -> ProbeResult
+        """
+        return asyncio.run(self._run(list(dict.fromkeys(urls))))
@@ -0,0 +1,110 @@
+import sqlite3
+import time
+from dns_cache import HostNotFound
+from probe_engine import HostCircuitOpen
+
+# 检测历史 2026-10-18
+# 每个url记录最后出现时间、最后检测时间、连续成功/失败次数和响应时间的EWMA。
+# 连续结果越多越可信，重新检测的间隔按连续次数翻倍（HISTORY_MIN_INTERVAL 到 HISTORY_MAX_INTERVAL）：
+# 长期稳定（一直可用或一直不可用）的url很少重测，时好时坏的url每次都测，
+# 每次运行的检测量与变化量成正比，而不是与源的总数成正比。
+
+DAY = 24 * 60 * 60
+HISTORY_MIN_INTERVAL = 1 * DAY
+HISTORY_MAX_INTERVAL = 28 * DAY
+# 超过这么久没在上游出现的url从历史中删除
+HISTORY_EXPIRE = 90 * DAY
+# EWMA 中新响应时间的权重
+EWMA_ALPHA = 0.3
+# 熔断跳过、域名解析失败的url本次并没有真正检测，不计入连续次数（只更新 last_seen）
+NOT_PROBED_ERRORS = (HostCircuitOpen, HostNotFound)
+
+class ProbeHistory:
+    def __init__(self, db_path):
+        self.db = sqlite3.connect(db_path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS probe_history (
+                url TEXT PRIMARY KEY,
+                last_seen REAL NOT NULL,
+                last_probed REAL NOT NULL,
+                success_streak INTEGER NOT NULL DEFAULT 0,
+                failure_streak INTEGER NOT NULL DEFAULT 0,
+                ewma_latency REAL,
+                last_error TEXT
+            )""")
+
+    def load(self, urls):
+        """
+        :return: dict url -> (last_probed, success_streak, failure_streak, ewma_latency, last_error) of known urls
+        """
+        records = {}
+        urls = list(urls)
+        # sqlite 单条语句的参数个数有限，分批查询
+        for i in range(0, len(urls), 500):
+            batch = urls[i:i + 500]
+            rows = self.db.execute(
+                "SELECT url, last_probed, success_streak, failure_streak, ewma_latency, last_error "
+                f"FROM probe_history WHERE url IN ({','.join('?' * len(batch))})", batch)
+            for row in rows:
+                records[row[0]] = row[1:]
+        return records
+
+    @staticmethod
+    def interval(record):
+        _, success_streak, failure_streak, _, _ = record
+        streak = max(success_streak, failure_streak, 1)
+        return min(HISTORY_MIN_INTERVAL * 2 ** (streak - 1), HISTORY_MAX_INTERVAL)
+
+    def partition(self, urls, now=None):
+        """
+        Split urls into the ones that need a probe and the ones whose last result is still trusted.
+
+        :return: (list of urls to probe, dict url -> record of the skipped urls)
+        """
+        now = time.time() if now is None else now
+        records = self.load(urls)
+        due = []
+        fresh = {}
+        for url in urls:
+            record = records.get(url)
+            if record is None or now - record[0] >= self.interval(record):
+                due.append(url)
+            else:
+                fresh[url] = record
+        return due, fresh
+
+    def record(self, results, seen, now=None):
+        """
+        Store the probe results and mark every url in seen as still present upstream.
+
+        :param results: dict url -> ProbeResult of the urls probed in this run; results whose error is
+            one of NOT_PROBED_ERRORS are skipped
+        :param seen: All candidate urls of this run
+        """
+        now = time.time() if now is None else now
+        results = {url: result for url, result in results.items() if not isinstance(result.error, NOT_PROBED_ERRORS)}
+        records = self.load(results)
+        rows = []
+        for url, result in results.items():
+            _, success_streak, failure_streak, ewma_latency, _ = records.get(url, (now, 0, 0, None, None))
+            if result.success:
+                success_streak, failure_streak = success_streak + 1, 0
+                latency = result.elapsed_time
+                ewma_latency = latency if ewma_latency is None else EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * ewma_latency
+            else:
+                success_streak, failure_streak = 0, failure_streak + 1
+            error = None if result.error is None else str(result.error)
+            rows.append((url, now, now, success_streak, failure_streak, ewma_latency, error))
+        with self.db:
+            self.db.executemany("""
+                INSERT INTO probe_history (url, last_seen, last_probed, success_streak, failure_streak, ewma_latency, last_error)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    last_seen = excluded.last_seen, last_probed = excluded.last_probed,
+                    success_streak = excluded.success_streak, failure_streak = excluded.failure_streak,
+                    ewma_latency = excluded.ewma_latency, last_error = excluded.last_error""", rows)
+            self.db.executemany("UPDATE probe_history SET last_seen = ? WHERE url = ?", ((now, url) for url in seen))
+            self.db.execute("DELETE FROM probe_history WHERE last_seen < ?", (now - HISTORY_EXPIRE,))
+
+    def close(self):
+        self.db.close()
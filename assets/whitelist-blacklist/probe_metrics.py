@@ -0,0 +1,141 @@
+import asyncio
+import json
+import socket
+import ssl
+import threading
+from urllib.parse import urlsplit
+
+from dns_cache import HostNotFound
+from hls_probe import HLSError
+from probe_engine import HTTPStatusError, HostCircuitOpen
+from stream_probe import StreamProtocolError
+
+# 检测指标 2026-10-18
+# 按 host、scheme（http/https/rtmp/rtsp/rtp/p3p...）和失败原因统计检测耗时直方图，
+# 加锁后可以在多个线程中同时记录；结束时写成 JSON 和 Prometheus 文本格式，看清检测时间花在哪里。
+
+# 直方图上界（毫秒），最后一个桶为 +Inf
+BUCKETS_MS = (50, 100, 250, 500, 1000, 2000, 4000, 6000, 10000, 15000)
+
+def failure_reason(error):
+    """
+    Classify a probe error: timeout, dns, refused, reset, tls, http_<status>, circuit_open, hls, protocol or other.
+    """
+    if isinstance(error, HostCircuitOpen):
+        return 'circuit_open'
+    if isinstance(error, HTTPStatusError):
+        return f'http_{error.status}'
+    if isinstance(error, (TimeoutError, asyncio.TimeoutError)):
+        return 'timeout'
+    if isinstance(error, (HostNotFound, socket.gaierror)):
+        return 'dns'
+    if isinstance(error, ConnectionRefusedError):
+        return 'refused'
+    if isinstance(error, ssl.SSLError):
+        return 'tls'
+    if isinstance(error, (ConnectionError, asyncio.IncompleteReadError)):
+        return 'reset'
+    if isinstance(error, HLSError):
+        return 'hls'
+    if isinstance(error, (StreamProtocolError, ValueError)):
+        return 'protocol'
+    if isinstance(error, OSError):
+        return 'connect'
+    return 'other'
+
+class Histogram:
+    __slots__ = ('counts', 'total', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS_MS):
+            if value <= bound:
+                break
+        else:
+            i = len(BUCKETS_MS)
+        self.counts[i] += 1
+        self.total += value
+        self.count += 1
+
+    def to_dict(self):
+        buckets = {str(bound): count for bound, count in zip(BUCKETS_MS, self.counts)}
+        buckets['+Inf'] = self.counts[-1]
+        return {'count': self.count, 'sum_ms': round(self.total, 2), 'buckets': buckets}
+
+class ProbeMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.outcomes = {'success': 0, 'failure': 0}
+        self.by_host = {}
+        self.by_scheme = {}
+        self.by_reason = {}
+
+    def observe(self, url, result, duration_ms):
+        """
+        Record one probe.
+
+        :param result: ProbeResult
+        :param duration_ms: Wall time spent on the probe, also for failures
+        """
+        try:
+            parts = urlsplit(url)
+            host, scheme = parts.netloc, parts.scheme.lower()
+        except ValueError:
+            host, scheme = '', ''
+        reason = None if result.error is None else failure_reason(result.error)
+        if reason is None and not result.success:
+            reason = 'rejected'  # 没有异常但判定不可用（例如非200的2xx/3xx）
+        with self.lock:
+            self.outcomes['success' if result.success else 'failure'] += 1
+            self.by_host.setdefault(host, Histogram()).observe(duration_ms)
+            self.by_scheme.setdefault(scheme, Histogram()).observe(duration_ms)
+            if reason is not None:
+                self.by_reason.setdefault(reason, Histogram()).observe(duration_ms)
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'outcomes': dict(self.outcomes),
+                'buckets_ms': list(BUCKETS_MS),
+                'by_scheme': {key: value.to_dict() for key, value in sorted(self.by_scheme.items())},
+                'by_reason': {key: value.to_dict() for key, value in sorted(self.by_reason.items())},
+                # host按总耗时从高到低，最费时间的排在前面
+                'by_host': {key: value.to_dict() for key, value in
+                            sorted(self.by_host.items(), key=lambda item: -item[1].total)},
+            }
+
+    def write_json(self, file_path):
+        with open(file_path, 'w', encoding='utf-8') as file:
+            json.dump(self.to_dict(), file, ensure_ascii=False, indent=1)
+
+    def write_prometheus(self, file_path):
+        lines = [
+            '# HELP iptv_probe_total Probes by outcome.',
+            '# TYPE iptv_probe_total counter',
+        ]
+        with self.lock:
+            for outcome, count in self.outcomes.items():
+                lines.append(f'iptv_probe_total{{outcome="{outcome}"}} {count}')
+            for label, metric, histograms in (('scheme', 'iptv_probe_scheme_duration_seconds', self.by_scheme),
+                                              ('reason', 'iptv_probe_failure_duration_seconds', self.by_reason),
+                                              ('host', 'iptv_probe_host_duration_seconds', self.by_host)):
+                lines.append(f'# HELP {metric} Probe duration by {label}.')
+                lines.append(f'# TYPE {metric} histogram')
+                for key, histogram in sorted(histograms.items()):
+                    value = prometheus_label(key)
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS_MS, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound / 1000:g}"}} {cumulative}')
+                    lines.append(f'{metric}_bucket{{{label}="{value}",le="+Inf"}} {histogram.count}')
+                    lines.append(f'{metric}_sum{{{label}="{value}"}} {histogram.total / 1000:.6f}')
+                    lines.append(f'{metric}_count{{{label}="{value}"}} {histogram.count}')
+        with open(file_path, 'w', encoding='utf-8') as file:
+            file.write('\n'.join(lines) + '\n')
+
+def prometheus_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,106 @@
+import os
+import ssl
+import struct
+import time
+from urllib.parse import quote, urlsplit
+
+# RTSP/RTMP 原生检测 2026-10-18
+# 不再为每个 rtsp/rtmp 源启动一个 ffprobe 进程，直接在检测引擎的协程里完成协议握手：
+#   RTSP  OPTIONS + DESCRIBE，DESCRIBE 返回 200 说明节目存在
+#   RTMP  C0/C1 -> S0/S1 -> C2 -> S2 握手，说明 RTMP 服务在线
+# ffprobe 只作为可选的深度检测（PROBE_FFPROBE_DEEP），在原生检测通过后再确认流能解码。
+
+NATIVE_SCHEMES = ('rtsp', 'rtmp', 'rtmps')
+DEFAULT_PORTS = {'rtsp': 554, 'rtmp': 1935, 'rtmps': 443}
+
+RTMP_VERSION = 3
+RTMP_HANDSHAKE_SIZE = 1536
+# RTMPE（加密握手）的版本号，服务器在线，同样算可用
+RTMP_ENCRYPTED_VERSION = 6
+
+RTSP_USER_AGENT = 'PostmanRuntime-ApipostRuntime/1.1.0'
+MAX_RTSP_HEADER_SIZE = 64 * 1024
+
+ssl_context = ssl.create_default_context()
+
+class StreamProtocolError(Exception):
+    pass
+
+def is_native_stream(url):
+    return urlsplit(url).scheme.lower() in NATIVE_SCHEMES
+
+async def read_rtsp_response(reader):
+    """
+    :return: (status, reason, headers dict with lower-case keys)
+    """
+    status_line = (await reader.readline()).decode('iso-8859-1').strip()
+    parts = status_line.split(None, 2)
+    if len(parts) < 2 or not parts[0].startswith('RTSP/') or not parts[1].isdigit():
+        raise StreamProtocolError(f"Bad RTSP status line: {status_line!r}")
+    response_headers = {}
+    size = 0
+    while True:
+        line = await reader.readline()
+        size += len(line)
+        if size > MAX_RTSP_HEADER_SIZE:
+            raise StreamProtocolError("RTSP response header too large")
+        if line in (b'\r\n', b'\n', b''):
+            break
+        key, _, value = line.decode('iso-8859-1').partition(':')
+        response_headers[key.strip().lower()] = value.strip()
+    length = response_headers.get('content-length', '')
+    if length.isdigit():
+        await reader.readexactly(int(length))
+    return int(parts[1]), parts[2] if len(parts) > 2 else '', response_headers
+
+async def probe_rtsp(url, reader, writer):
+    # 与 probe_http 相同先转义，中文等非ASCII路径不能直接按 latin-1 编码
+    request_url = quote(url, safe=':/?&=')
+    cseq = 0
+    for method, extra in (('OPTIONS', ''), ('DESCRIBE', 'Accept: application/sdp\r\n')):
+        cseq += 1
+        writer.write((f"{method} {request_url} RTSP/1.0\r\nCSeq: {cseq}\r\nUser-Agent: {RTSP_USER_AGENT}\r\n{extra}\r\n")
+                     .encode('latin-1'))
+        await writer.drain()
+        status, reason, _ = await read_rtsp_response(reader)
+        # 部分服务器不实现 OPTIONS，只要 DESCRIBE 成功即可
+        if method == 'DESCRIBE' and status != 200:
+            raise StreamProtocolError(f"RTSP Error {status}: {reason}")
+    return True
+
+async def probe_rtmp(reader, writer):
+    c1 = struct.pack('>II', int(time.time()) & 0xFFFFFFFF, 0) + os.urandom(RTMP_HANDSHAKE_SIZE - 8)
+    writer.write(bytes([RTMP_VERSION]) + c1)
+    await writer.drain()
+    s0 = (await reader.readexactly(1))[0]
+    if s0 not in (RTMP_VERSION, RTMP_ENCRYPTED_VERSION):
+        raise StreamProtocolError(f"Unexpected RTMP version {s0}")
+    s1 = await reader.readexactly(RTMP_HANDSHAKE_SIZE)
+    # C2 原样回送 S1，收到 S2 即握手完成
+    writer.write(s1)
+    await writer.drain()
+    await reader.readexactly(RTMP_HANDSHAKE_SIZE)
+    return True
+
+async def probe_stream(url, dns):
+    """
+    Probe an rtsp/rtmp url with a native protocol exchange.
+
+    :param dns: DNSCache with the pre-resolved addresses
+    :return: True if the server answered the handshake
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = parts.hostname
+    if not host:
+        raise ValueError(f"Invalid {scheme} URL")
+    port = parts.port or DEFAULT_PORTS[scheme]
+    tls = scheme == 'rtmps'
+    reader, writer = await dns.open_connection(host, port, ssl=ssl_context if tls else None,
+                                               server_hostname=host if tls else None)
+    try:
+        if scheme == 'rtsp':
+            return await probe_rtsp(url, reader, writer)
+        return await probe_rtmp(reader, writer)
+    finally:
+        writer.close()
@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+from difflib import SequenceMatcher
+
+# 频道名模糊匹配的性能测试 2026-10-18
+# 取 others.txt 中未匹配的频道名，统计三字组索引每次查找的耗时（平均和P99），
+# 再用一小部分名称与逐个 difflib 比较全部字典名的做法对比。
+# 用法：python benchmarks/bench_fuzzy.py [others.txt] [逐个比较的名称数]
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+from categories import load_categories
+from fetcher import iter_lines
+from fuzzy_names import TrigramIndex, FUZZY_REVIEW_SCORE, is_confident
+
+def unmatched_names(file_path, category_index):
+    names = set()
+    for line in iter_lines(file_path):
+        if "#genre#" not in line and "," in line and "://" in line:
+            name = line.split(',')[0]
+            if name and name not in category_index:
+                names.add(name)
+    return sorted(names)
+
+def naive_lookup(name, dictionary_names):
+    best = max(dictionary_names, key=lambda candidate: SequenceMatcher(None, name, candidate).ratio())
+    return best, SequenceMatcher(None, name, best).ratio()
+
+if __name__ == "__main__":
+    others_file = sys.argv[1] if len(sys.argv) > 1 else os.path.join(root_dir, 'others.txt')
+    naive_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    _, category_index, _, _ = load_categories(root_dir)
+    names = unmatched_names(others_file, category_index)
+
+    start = time.perf_counter()
+    index = TrigramIndex(category_index)
+    print(f"字典名: {len(index.names)} 三字组: {len(index.postings)} 建索引 {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    timings = []
+    results = []
+    for name in names:
+        start = time.perf_counter()
+        result = index.lookup(name)
+        timings.append(time.perf_counter() - start)
+        results.append(result)
+    timings.sort()
+    print(f"未匹配频道名: {len(names)} 平均 {sum(timings) / len(timings) * 1e6:.1f} us"
+          f"  P99 {timings[int(len(timings) * 0.99)] * 1e6:.1f} us  最大 {timings[-1] * 1e6:.1f} us")
+    candidates = [(name, result) for name, result in zip(names, results) if result is not None]
+    confident = sum(1 for name, (candidate, score) in candidates if is_confident(name, candidate, score))
+    print(f"相似度>={FUZZY_REVIEW_SCORE}的候选: {len(candidates)} 其中高置信度: {confident}")
+
+    sample = names[:naive_count]
+    dictionary_names = index.names
+    start = time.perf_counter()
+    for name in sample:
+        naive_lookup(name, dictionary_names)
+    naive = (time.perf_counter() - start) / len(sample)
+    print(f"逐个 difflib 比较: 平均 {naive * 1e6:.1f} us ({len(sample)} 个名称)")
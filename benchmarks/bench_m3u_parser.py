@@ -0,0 +1,56 @@
+import os
+import re
+import sys
+import time
+
+# m3u_parser 吞吐量测试：用仓库自己的 live.m3u 对比旧的逐行正则转换
+# 用法：python benchmarks/bench_m3u_parser.py [m3u文件] [重复次数]
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+from m3u_parser import parse_playlist, parse_channel_lines
+
+# 旧版 main.py 的 convert_m3u_to_txt，仅用于对比
+def legacy_convert_m3u_to_txt(lines):
+    txt_lines = []
+    channel_name = ""
+    for line in lines:
+        if line.startswith("#EXTM3U"):
+            continue
+        if line.startswith("#EXTINF"):
+            channel_name = line.split(',')[-1].strip()
+        elif line.startswith("http") or line.startswith("rtmp") or line.startswith("p3p") :
+            txt_lines.append(f"{channel_name},{line.strip()}")
+        if "#genre#" not in line and "," in line and "://" in line:
+            pattern = r'^[^,]+,[^\s]+://[^\s]+$'
+            if bool(re.match(pattern, line)):
+                txt_lines.append(line)
+    return txt_lines
+
+def bench(name, func, lines, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(lines)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<12} {len(result):>8} 条  {best * 1000:8.2f} ms  {len(lines) / best:12.0f} 行/秒")
+    return result
+
+if __name__ == "__main__":
+    m3u_file = sys.argv[1] if len(sys.argv) > 1 else os.path.join(root_dir, 'live.m3u')
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    with open(m3u_file, 'r', encoding='utf-8') as file:
+        lines = file.read().split('\n')
+    print(f"文件: {m3u_file} 行数: {len(lines)} 重复: {repeat}")
+
+    bench("legacy", legacy_convert_m3u_to_txt, lines, repeat)
+    # 两个脚本实际使用的 频道名,url 输出
+    bench("channel", lambda lines: list(parse_channel_lines(lines)), lines, repeat)
+    entries = bench("m3u_parser", lambda lines: list(parse_playlist(lines)), lines, repeat)
+    # 包含属性解析（attrs 按需解析，这里全部访问一次）
+    bench("+attrs", lambda lines: [entry.attrs for entry in parse_playlist(lines)], lines, repeat)
+
+    with_attrs = sum(1 for entry in entries if entry.attrs)
+    groups = len({entry.group for entry in entries})
+    print(f"带属性记录: {with_attrs} 分组数: {groups}")
@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+
+# 频道名规则引擎的验证和性能测试 2026-10-18
+# normalize_golden.tsv 每行 原始名称\t期望结果（清理+纠错，不含繁简转换），由原来逐条 replace 的实现生成，
+# 其中去掉一个字符后拼出新规则匹配的三条（CCTV -1、iHOT -爱喜剧、电_电信信）人工改成了单次扫描的结果；
+# 逐行检查 channel_rules 编译后的结果，不一致时退出码为1，再与原实现比较速度。
+# 用法：python benchmarks/bench_normalize_rules.py [重复次数]
+#      python benchmarks/bench_normalize_rules.py --regenerate  补充新样例（已有条目保留原期望值）
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, root_dir)
+sys.path.insert(0, bench_dir)
+from channel_name import clean_channel_name, correct_name_data, removal_list, corrections_name
+from bench_t2s import collect_names
+
+GOLDEN_FILE = os.path.join(bench_dir, 'normalize_golden.tsv')
+# 每条规则从仓库的频道名里取的样例数
+EXAMPLES_PER_RULE = 5
+# 人工补充的边界情况
+EDGE_CASES = ["CCTV-HD", "CCTV -1", "CCTV-05", "CCTV05", "CCTV-0", "CCTV--1", "CCTV0-1", "CCTV 高清 1",
+              "NEW_TV", "NEWTV-剧场", "New_TV", "NEW TV", "NewTV-", "iHOT-爱电影", "iHOT -爱喜剧", "CCTV5PLUS",
+              "CCTV-5 PLUS 高清", "湖南卫视「IPV6」", "江苏卫视[HD](1080p)", "东方卫视 _电信", "凤凰卫视(HK)",
+              "凤凰中文@AKtv", "🎞️电影", "🎦 剧场", "超清高清", "[超清]湖南", "（HD）浙江卫视", "", " ", "-HD",
+              "高-HD清", "电_电信信", "IPIPV6V6", "[ipv6]CCTV-1[SD]", "翡翠台[VGA]", "CCTV1综合", "CCTV-1综合"]
+
+# 原实现：逐条 replace
+def legacy_clean_channel_name(channel_name, removal_list=removal_list):
+    for item in removal_list:
+        channel_name = channel_name.replace(item, "")
+    channel_name = channel_name.replace("CCTV-", "CCTV");
+    channel_name = channel_name.replace("CCTV0","CCTV");
+    channel_name = channel_name.replace("PLUS", "+");
+    channel_name = channel_name.replace("NewTV-", "NewTV");
+    channel_name = channel_name.replace("iHOT-", "iHOT");
+    channel_name = channel_name.replace("NEW", "New");
+    channel_name = channel_name.replace("New_", "New");
+    return channel_name
+
+def legacy_correct_name_data(name):
+    if name in corrections_name and name != corrections_name[name]:
+        name = corrections_name[name]
+    return name
+
+def legacy_normalize(name):
+    return legacy_correct_name_data(legacy_clean_channel_name(name))
+
+def normalize(name):
+    return correct_name_data(clean_channel_name(name))
+
+def regenerate():
+    golden = dict(load_golden()) if os.path.exists(GOLDEN_FILE) else {}
+    names = collect_names()
+    tokens = removal_list + ["CCTV-", "CCTV0", "PLUS", "NewTV-", "iHOT-", "NEW", "New_"]
+    selected = []
+    for token in tokens:
+        selected += [name for name in names if token in name][:EXAMPLES_PER_RULE]
+    # 纠错别名也各取一些
+    selected += list(corrections_name)[::max(len(corrections_name) // 50, 1)]
+    selected = list(golden) + selected + EDGE_CASES
+    seen = set()
+    with open(GOLDEN_FILE, 'w', encoding='utf-8') as file:
+        for name in selected:
+            if name in seen or '\t' in name or '\n' in name:
+                continue
+            seen.add(name)
+            file.write(f"{name}\t{golden.get(name, legacy_normalize(name))}\n")
+    print(f"已生成 {len(seen)} 条: {GOLDEN_FILE}")
+
+def load_golden():
+    cases = []
+    with open(GOLDEN_FILE, 'r', encoding='utf-8') as file:
+        for line in file:
+            name, expected = line.rstrip('\n').split('\t')
+            cases.append((name, expected))
+    return cases
+
+def bench(name, func, names, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in names:
+            func(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<10} {best * 1000:10.2f} ms  {len(names) / best:12.0f} 个/秒")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--regenerate':
+        regenerate()
+        sys.exit(0)
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    cases = load_golden()
+    mismatches = [(name, expected, normalize(name)) for name, expected in cases if normalize(name) != expected]
+    print(f"金标准: {len(cases)} 条 不一致: {len(mismatches)}")
+    for name, expected, actual in mismatches[:20]:
+        print(f"  {name!r}: 期望 {expected!r} 实际 {actual!r}")
+
+    names = collect_names()
+    differences = sum(1 for name in names if normalize(name) != legacy_normalize(name))
+    print(f"仓库频道名: {len(names)} 与原实现不同: {differences}")
+    bench("legacy", legacy_normalize, names, repeat)
+    bench("rules", normalize, names, repeat)
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,121 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# main.py 各阶段性能测试 2026-10-18
+# main.py 在 import 时就会执行，无法单独计时；这里用合成语料分别调用各阶段使用的函数，
+# 输出每个阶段的 行/秒 和峰值内存，可保存为 JSON 与之前的结果对比。
+# 用法：python benchmarks/bench_stages.py [--sizes 10000 100000 1000000] [--json 结果.json]
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from categories import load_categories, sort_data
+from channel_name import traditional_to_simplified, clean_channel_name, correct_name_data, normalize_channel_name
+from m3u_parser import parse_playlist
+from playlist_emitter import PlaylistEmitter
+from synthetic_corpus import generate_corpus, load_name_pool
+from url_key import canonical_url
+
+def measure(func, data):
+    """
+    Run func(data) twice: once for time, once under tracemalloc for the peak memory.
+
+    :return: (seconds, peak bytes, result)
+    """
+    start = time.perf_counter()
+    result = func(data)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, result
+
+def run_stages(lines):
+    dictionaries, name_index, sort_modes, titles = load_categories(root_dir)
+    results = []
+
+    def stage(name, func, data):
+        elapsed, peak, result = measure(func, data)
+        results.append({'stage': name, 'lines': len(data), 'seconds': round(elapsed, 4),
+                        'lines_per_sec': round(len(data) / elapsed) if elapsed else None,
+                        'peak_mb': round(peak / 1024 / 1024, 2)})
+        return result
+
+    entries = stage('parse', lambda lines: list(parse_playlist(lines)), lines)
+    pairs = [(entry.name, entry.url) for entry in entries]
+    raw_names = [name for name, _ in pairs]
+
+    simplified = stage('t2s', lambda names: [traditional_to_simplified(name) for name in names], raw_names)
+    cleaned = stage('clean', lambda names: [clean_channel_name(name) for name in names], simplified)
+    stage('correct', lambda names: [correct_name_data(name) for name in names], cleaned)
+
+    def normalize(names):
+        normalize_channel_name.cache_clear()
+        return [normalize_channel_name(name) for name in names]
+    names = stage('normalize(cached)', normalize, raw_names)
+    normalized = [(name, url) for name, (_, url) in zip(names, pairs)]
+
+    categories = stage('classify', lambda pairs: [name_index.get(name) for name, _ in pairs], normalized)
+
+    # 与 main.py 相同：每个分类一个规范化url（canonical_url）集合，先到先得，输出第一次出现的原始url
+    def dedupe(items):
+        category_urls = {title: set() for title in titles}
+        category_lines = {title: [] for title in titles}
+        for (name, url), category in items:
+            if category is None or "127.0.0.1" in url:
+                continue
+            url_key = canonical_url(url)
+            if url_key not in category_urls[category]:
+                category_urls[category].add(url_key)
+                category_lines[category].append(f"{name},{url}")
+        return category_lines
+    category_lines = stage('dedupe', dedupe, list(zip(normalized, categories)))
+    kept = sum(len(lines) for lines in category_lines.values())
+
+    def sort_all(titles):
+        return {title: sort_data(dictionaries[title], category_lines[title]) if sort_modes[title]
+                else sorted(category_lines[title]) for title in titles}
+    sorted_lines = stage('sort', sort_all, titles)
+    results[-1]['lines'] = kept
+    results[-1]['lines_per_sec'] = round(kept / results[-1]['seconds']) if results[-1]['seconds'] else None
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        def emit(titles):
+            with PlaylistEmitter(os.path.join(tmp_dir, 'live.txt'), os.path.join(tmp_dir, 'live.m3u')) as emitter:
+                for title in titles:
+                    emitter.write('\n')
+                    emitter.write(f"{title},#genre#")
+                    for line in sorted_lines[title]:
+                        emitter.write(line)
+        stage('emit(txt+m3u)', emit, titles)
+        results[-1]['lines'] = kept
+        results[-1]['lines_per_sec'] = round(kept / results[-1]['seconds']) if results[-1]['seconds'] else None
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time each stage of main.py on synthetic corpora")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="Save the results to this file")
+    args = parser.parse_args()
+
+    names = load_name_pool()
+    report = {}
+    for size in args.sizes:
+        lines = generate_corpus(size, args.seed, names)
+        print(f"\n语料行数: {size}")
+        print(f"{'阶段':<18}{'行数':>10}{'秒':>10}{'行/秒':>14}{'峰值MB':>10}")
+        report[size] = run_stages(lines)
+        for row in report[size]:
+            print(f"{row['stage']:<20}{row['lines']:>10}{row['seconds']:>10.3f}{row['lines_per_sec'] or 0:>14}"
+                  f"{row['peak_mb']:>10.2f}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=1)
+        print(f"结果已保存到 {args.json}")
@@ -0,0 +1,54 @@
+import glob
+import os
+import sys
+import time
+
+# 简繁转换快速路径的验证和性能测试
+# 收集仓库中所有播放列表、黑白名单、分类字典和纠错文件里的频道名，
+# 逐个比较 traditional_to_simplified 与完整 OpenCC 转换的结果，不一致时退出码为1。
+# 用法：python benchmarks/bench_t2s.py [重复次数]
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+from channel_name import converter, traditional_to_simplified
+from fetcher import iter_lines
+from m3u_parser import parse_playlist
+
+def collect_names():
+    names = set()
+    files = glob.glob(os.path.join(root_dir, '*.txt')) + glob.glob(os.path.join(root_dir, '*.m3u'))
+    files += glob.glob(os.path.join(root_dir, 'assets', '**', '*.txt'), recursive=True)
+    for file in files:
+        for entry in parse_playlist(iter_lines(file)):
+            names.add(entry.name)
+        # 字典、纠错文件和黑白名单里不是 频道名,url 形式的行，按逗号拆分取名称
+        for line in iter_lines(file):
+            names.update(part.strip() for part in line.split(',') if part.strip() and "://" not in part)
+    for dir_name in ('主频道', '地方台'):
+        for file in glob.glob(os.path.join(root_dir, dir_name, '*.txt')):
+            names.update(line.strip() for line in iter_lines(file) if line.strip())
+    return sorted(names)
+
+def bench(name, func, names, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in names:
+            func(item)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"{name:<10} {best * 1000:10.2f} ms  {len(names) / best:12.0f} 个/秒")
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    names = collect_names()
+    mismatches = [(name, traditional_to_simplified(name), converter.convert(name)) for name in names
+                  if traditional_to_simplified(name) != converter.convert(name)]
+    changed = sum(1 for name in names if converter.convert(name) != name)
+    print(f"频道名: {len(names)} 其中繁简不同: {changed} 不一致: {len(mismatches)}")
+    for name, fast, full in mismatches[:20]:
+        print(f"  {name!r}: 快速路径 {fast!r} OpenCC {full!r}")
+
+    bench("opencc", converter.convert, names, repeat)
+    bench("fast", traditional_to_simplified, names, repeat)
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,91 @@
+import os
+import random
+import sys
+
+# 合成直播源语料 2026-10-18
+# 频道名取自 主频道/、地方台/ 的字典和 assets/corrections_name.txt 的别名，
+# 再加上上游常见的修饰（高清、[HD]、CCTV-1、繁体等）和一部分不在字典里的名称；
+# txt（#genre# 分组）和 m3u（#EXTINF）两种格式混合，url 有重复、带 $ 后缀和 # 分隔的多地址。
+# 用法：python benchmarks/synthetic_corpus.py 行数 [输出文件] [随机种子]
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_dir)
+from categories import load_categories
+from channel_name import removal_list
+
+DECORATIONS = ["高清", "[HD]", "-HD", "超清", "「IPV6」", "_电信", "(1080p)", " ", "[BD]"]
+# 常见的繁体写法，覆盖 t2s 转换
+TRADITIONAL = {"卫视": "衛視", "电影": "電影", "频道": "頻道", "综艺": "綜藝", "新闻": "新聞", "体育": "體育",
+               "凤凰": "鳳凰", "台湾": "臺灣", "中文": "中文", "剧场": "劇場"}
+UNKNOWN_NAMES = ["测试频道", "未知台", "Test Channel", "本地直播", "轮播", "点播"]
+GROUPS = ["央视", "卫视", "地方", "港澳台", "影视", "其他"]
+
+def load_name_pool(base_dir=root_dir):
+    """
+    :return: List of channel names: dictionary names, correction aliases and unknown names
+    """
+    dictionaries, _, _, _ = load_categories(base_dir)
+    names = [name for names in dictionaries.values() for name in names if name]
+    with open(os.path.join(base_dir, 'assets/corrections_name.txt'), 'r', encoding='utf-8') as file:
+        for line in file:
+            names += [alias for alias in line.strip().split(',')[1:] if alias]
+    return names + UNKNOWN_NAMES
+
+def decorate(name, rng):
+    roll = rng.random()
+    if roll < 0.15:
+        name += rng.choice(DECORATIONS)
+    elif roll < 0.25:
+        for simplified, traditional in TRADITIONAL.items():
+            name = name.replace(simplified, traditional)
+    elif roll < 0.30 and name.startswith("CCTV"):
+        name = name.replace("CCTV", rng.choice(["CCTV-", "CCTV0"]), 1)
+    elif roll < 0.33:
+        name = rng.choice(removal_list) + name
+    return name
+
+def make_url(rng, hosts):
+    host = rng.choice(hosts)
+    url = f"{rng.choice(['http', 'http', 'http', 'https', 'rtmp', 'rtsp'])}://{host}/live/{rng.randrange(5000)}/index.m3u8"
+    roll = rng.random()
+    if roll < 0.05:
+        url += f"${rng.choice(['1080p', '线路2', 'IPV6'])}"
+    elif roll < 0.08:
+        url += f"#http://{rng.choice(hosts)}/backup/{rng.randrange(5000)}.m3u8"
+    return url
+
+def generate_corpus(line_count, seed=0, names=None):
+    """
+    Generate a mixed txt/m3u playlist of about line_count lines.
+
+    :return: List of lines (without line breaks)
+    """
+    rng = random.Random(seed)
+    names = names or load_name_pool()
+    hosts = [f"{rng.randrange(1, 224)}.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}:"
+             f"{rng.choice([80, 8080, 9901, 808])}" for _ in range(max(line_count // 40, 10))]
+    hosts += [f"cdn{i}.example-iptv.com" for i in range(max(line_count // 400, 5))]
+    lines = []
+    m3u = False
+    while len(lines) < line_count:
+        # 每段 200 行左右切换一次格式，模拟多个上游拼接
+        if not lines or rng.random() < 0.005:
+            m3u = rng.random() < 0.4
+            lines.append("#EXTM3U" if m3u else f"{rng.choice(GROUPS)},#genre#")
+        name = decorate(rng.choice(names), rng)
+        url = make_url(rng, hosts)
+        if m3u:
+            lines.append(f'#EXTINF:-1 tvg-id="{name}" tvg-name="{name}" group-title="{rng.choice(GROUPS)}",{name}')
+            lines.append(url)
+        else:
+            lines.append(f"{name},{url}")
+    return lines[:line_count]
+
+if __name__ == "__main__":
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    output = sys.argv[2] if len(sys.argv) > 2 else f"synthetic_{line_count}.txt"
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    with open(output, 'w', encoding='utf-8') as file:
+        for line in generate_corpus(line_count, seed):
+            file.write(line + '\n')
+    print(f"已生成 {line_count} 行: {output}")
@@ -0,0 +1,139 @@
+import os
+
+# 分类注册表 2026-10-18
+# 频道名 -> 分类 的字典在启动时一次性建好，分发时每行只需查一次字典。
+# 新增分类只需在 主频道/ 或 地方台/ 下放入新的txt文件：
+# 未在 CATEGORY_FILES 中登记的文件会自动追加到匹配顺序和 live.txt 的末尾。
+
+CATEGORY_DIRS = ['主频道', '地方台']
+
+# 按原 elif 分发顺序排列，先匹配者优先
+# (字典文件, genre标题, 是否按字典顺序排序；False表示按整行排序)
+CATEGORY_FILES = [
+    ('主频道/央视频道.txt', '央视频道', True),
+    ('主频道/卫视频道.txt', '卫视频道', True),
+    ('主频道/体育频道.txt', '体育频道', True),
+    ('主频道/电影.txt', '电影频道', True),
+    ('主频道/电视剧.txt', '电视剧频道', True),
+    ('主频道/港澳台.txt', '港澳台', True),
+    ('主频道/国际台.txt', '国际台', True),
+    ('主频道/纪录片.txt', '纪录片', True),
+    ('主频道/戏曲频道.txt', '戏曲频道', True),
+    ('主频道/解说频道.txt', '解说频道', False),
+    ('主频道/春晚.txt', '春晚', True),
+    ('主频道/NewTV.txt', 'NewTV', True),
+    ('主频道/iHOT.txt', 'iHOT', True),
+    ('主频道/儿童频道.txt', '儿童', True),
+    ('主频道/综艺频道.txt', '综艺频道', True),
+    ('主频道/埋堆堆.txt', '埋堆堆', True),
+    ('主频道/音乐频道.txt', '音乐频道', False),
+    ('主频道/游戏频道.txt', '游戏频道', False),
+    ('主频道/收音机频道.txt', '收音机频道', True),
+    ('主频道/咪咕直播.txt', '咪咕直播', True),
+    ('地方台/上海频道.txt', '上海频道', True),
+    ('地方台/浙江频道.txt', '浙江频道', True),
+    ('地方台/江苏频道.txt', '江苏频道', False),
+    ('地方台/广东频道.txt', '广东频道', True),
+    ('地方台/湖南频道.txt', '湖南频道', True),
+    ('地方台/湖北频道.txt', '湖北频道', True),
+    ('地方台/安徽频道.txt', '安徽频道', False),
+    ('地方台/海南频道.txt', '海南频道', False),
+    ('地方台/内蒙频道.txt', '内蒙频道', False),
+    ('地方台/辽宁频道.txt', '辽宁频道', False),
+    ('地方台/陕西频道.txt', '陕西频道', False),
+    ('地方台/山西频道.txt', '山西频道', False),
+    ('地方台/山东频道.txt', '山东频道', True),
+    ('地方台/云南频道.txt', '云南频道', False),
+    ('地方台/北京频道.txt', '北京频道', False),
+    ('地方台/重庆频道.txt', '重庆频道', False),
+    ('地方台/福建频道.txt', '福建频道', False),
+    ('地方台/甘肃频道.txt', '甘肃频道', False),
+    ('地方台/广西频道.txt', '广西频道', False),
+    ('地方台/贵州频道.txt', '贵州频道', False),
+    ('地方台/河北频道.txt', '河北频道', False),
+    ('地方台/河南频道.txt', '河南频道', False),
+    ('地方台/黑龙江频道.txt', '黑龙江频道', False),
+    ('地方台/吉林频道.txt', '吉林频道', False),
+    ('地方台/宁夏频道.txt', '宁夏频道', False),
+    ('地方台/江西频道.txt', '江西频道', False),
+    ('地方台/青海频道.txt', '青海频道', False),
+    ('地方台/四川频道.txt', '四川频道', False),
+    ('地方台/天津频道.txt', '天津频道', False),
+    ('地方台/新疆频道.txt', '新疆频道', False),
+    ('主频道/直播中国.txt', '直播中国', False),
+    ('主频道/MTV.txt', 'MTV', False),
+]
+
+# live_lite.txt 的分类输出顺序
+LITE_TITLES = ['央视频道', '卫视频道', '港澳台', '电影频道', '电视剧频道', '综艺频道', 'NewTV', 'iHOT',
+               '体育频道', '咪咕直播', '埋堆堆', '音乐频道', '游戏频道', '解说频道']
+
+# live.txt 的分类输出顺序（精简版之后追加的部分）
+FULL_TITLES = LITE_TITLES + ['儿童', '国际台', '纪录片', '戏曲频道', '上海频道', '湖南频道', '湖北频道',
+               '广东频道', '浙江频道', '山东频道', '江苏频道', '安徽频道', '海南频道', '内蒙频道', '辽宁频道',
+               '陕西频道', '山西频道', '云南频道', '北京频道', '重庆频道', '福建频道', '甘肃频道', '广西频道',
+               '贵州频道', '河北频道', '河南频道', '黑龙江频道', '吉林频道', '江西频道', '宁夏频道', '青海频道',
+               '四川频道', '天津频道', '新疆频道', '春晚', '直播中国', 'MTV', '收音机频道']
+
+#读取字典文件，与main.py的read_txt_to_array一致
+def read_dictionary(file_name):
+    try:
+        with open(file_name, 'r', encoding='utf-8') as file:
+            return [line.strip() for line in file]
+    except FileNotFoundError:
+        print(f"File '{file_name}' not found.")
+        return []
+
+# 按字典顺序排序分类内的行（由 main.py 移入，便于单独测试性能）2026-10-18
+def sort_data(order, data):
+    # 创建一个字典来存储每行数据的索引
+    order_dict = {name: i for i, name in enumerate(order)}
+    
+    # 定义一个排序键函数，处理不在 order_dict 中的字符串
+    def sort_key(line):
+        name = line.split(',')[0]
+        return order_dict.get(name, len(order))
+    
+    # 按照 order 中的顺序对数据进行排序
+    sorted_data = sorted(data, key=sort_key)
+    return sorted_data
+
+def list_category_files(base_dir='.'):
+    """
+    Return the (file, title, sort_by_dictionary) entries in match order.
+    Files under CATEGORY_DIRS that are not registered are appended with their file name as title.
+    """
+    entries = list(CATEGORY_FILES)
+    registered = {file for file, _, _ in entries}
+    for dir_name in CATEGORY_DIRS:
+        dir_path = os.path.join(base_dir, dir_name)
+        if not os.path.isdir(dir_path):
+            continue
+        for file_name in sorted(os.listdir(dir_path)):
+            file = f'{dir_name}/{file_name}'
+            if file_name.endswith('.txt') and file not in registered:
+                entries.append((file, file_name[:-len('.txt')], True))
+    return entries
+
+def load_categories(base_dir='.'):
+    """
+    Build the category registry.
+
+    :param base_dir: Directory containing 主频道/ and 地方台/
+    :return: (dictionaries, name_index, sort_modes, full_titles)
+        dictionaries: genre title -> channel name list (file order, used by sort_data)
+        name_index: channel name -> genre title, first match wins
+        sort_modes: genre title -> True if sorted by dictionary order
+        full_titles: live.txt output order including auto discovered categories
+    """
+    dictionaries = {}
+    name_index = {}
+    sort_modes = {}
+    for file, title, sort_by_dictionary in list_category_files(base_dir):
+        names = read_dictionary(os.path.join(base_dir, file))
+        dictionaries[title] = names
+        sort_modes[title] = sort_by_dictionary
+        for name in names:
+            name_index.setdefault(name, title)  # 保持原elif的先匹配优先
+    full_titles = FULL_TITLES + [title for title in dictionaries if title not in FULL_TITLES]
+    return dictionaries, name_index, sort_modes, full_titles
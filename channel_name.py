@@ -0,0 +1,88 @@
+import os
+import re
+from functools import lru_cache
+import opencc #简繁转换
+from channel_rules import load_rules
+
+# 频道名规范化：繁转简 -> 剔除特定字符 -> 纠错 2026-10-18
+# 同一批频道名在71个上游和白名单里反复出现，整条流水线按原始名称做LRU缓存。
+
+# 全局只初始化一次转换器，"t2s" 表示从繁体转为简体
+converter = opencc.OpenCC('t2s')
+
+# 简繁转换快速路径 2026-10-18
+# 频道名很短，繁简差异几乎都是单字映射：用 OpenCC 自带的字符字典建 str.translate 表，
+# 只有包含词组字典条目的名称才交给完整的分词转换；纯 ASCII 的名称直接返回。
+# 结果与 converter.convert 相同（benchmarks/bench_t2s.py 用仓库中所有频道名验证）。
+T2S_DICTIONARY_DIR = os.path.join(os.path.dirname(opencc.__file__), 'dictionary')
+
+def read_opencc_dictionary(file_name):
+    # 与 OpenCC 读取字典的方式相同：key\tvalue，多个候选时取第一个
+    entries = {}
+    with open(os.path.join(T2S_DICTIONARY_DIR, file_name), 'r', encoding='utf-8') as file:
+        for line in file:
+            key, value = line.strip().split('\t')
+            entries[key] = value.split(' ')[0]
+    return entries
+
+def load_t2s_tables():
+    """
+    :return: (str.translate table of single characters, regex matching names that need the full converter),
+        or (None, None) if the OpenCC dictionaries are not available
+    """
+    try:
+        characters = read_opencc_dictionary('TSCharacters.txt')
+        phrases = read_opencc_dictionary('TSPhrases.txt')
+    except (OSError, ValueError):
+        return None, None
+    table = {}
+    for key, value in characters.items():
+        # 分隔符不参与 OpenCC 的转换，多字条目按词组处理
+        if len(key) == 1 and not converter.split_chars_re.fullmatch(key):
+            table[ord(key)] = value
+        else:
+            phrases[key] = value
+    phrase_re = re.compile('|'.join(re.escape(key) for key in sorted(phrases, key=len, reverse=True)))
+    return table, phrase_re
+
+t2s_table, t2s_phrase_re = load_t2s_tables()
+
+#简繁转换
+def traditional_to_simplified(text: str) -> str:
+    if text.isascii():
+        return text
+    if t2s_table is None or t2s_phrase_re.search(text):
+        return converter.convert(text)
+    return text.translate(t2s_table)
+
+# 添加channel_name前剔除部分特定字符、固定替换和纠错 2026-10-18
+# 规则移到 assets/normalize_rules.json，由 channel_rules 编译成一个正则，每个名称只扫描一遍
+# 去除字符以规则文件为准，removal_list 只供查看和生成测试数据
+rules = load_rules()
+removal_list = rules.removals
+def clean_channel_name(channel_name):
+    return rules.clean(channel_name)
+
+#纠错频道名称
+corrections_name = rules.corrections
+def correct_name_data(name):
+    return rules.correct(name)
+
+# 缓存上限：远大于实际出现的不同频道名数量
+NORMALIZE_CACHE_SIZE = 65536
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_channel_name(raw_name):
+    channel_name = traditional_to_simplified(raw_name)  #繁转简
+    channel_name = clean_channel_name(channel_name)  #分发前清理channel_name中特定字符
+    return correct_name_data(channel_name).strip() #根据纠错文件处理
+
+# 缓存命中统计，便于在运行日志里确认命中率
+# worker_stats: 多进程规范化时各子进程的 (hits, misses)，与主进程的合计
+def normalize_cache_stats(worker_stats=()):
+    info = normalize_channel_name.cache_info()
+    hits = info.hits + sum(stats[0] for stats in worker_stats)
+    misses = info.misses + sum(stats[1] for stats in worker_stats)
+    total = hits + misses
+    hit_ratio = hits / total if total else 0.0
+    return hits, misses, hit_ratio
@@ -0,0 +1,86 @@
+import json
+import os
+import re
+
+# 频道名规范化规则 2026-10-18
+# 原 clean_channel_name 对每个名称依次做 25 次 replace 去除特定字符，再做 7 次固定替换，纠错另外查一次字典。
+# 现在去除字符、替换规则（支持正则，如 CCTV-?0?）和纠错文件都写在 assets/normalize_rules.json 里，
+# 去除字符和替换规则编译成一个正则分支，每个名称只扫描一遍（一次 sub），纠错仍是一次字典查找。
+# 原实现先做完全部去除再做替换，去掉一个字符后拼出的新字符（如 "CCTV -1" 去掉空格后的 "CCTV-"）也会被处理；
+# 单次扫描不再处理这类拼接，仓库中的频道名没有这种情况，结果与原实现相同。
+
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets/normalize_rules.json')
+
+#读取纠错频道名称方法
+def load_corrections_name(filename):
+    corrections = {}
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip(): #跳过空行
+                continue
+            parts = line.strip().split(',')
+            correct_name = parts[0]
+            for name in parts[1:]:
+                corrections[name] = correct_name
+    return corrections
+
+class NormalizeRules:
+    """
+    Compiled removal tokens, rewrite rules and name corrections.
+
+    :param removals: Substrings removed from channel names
+    :param rewrites: List of {"pattern", "replace", "regex"}; at the same position a removal wins
+    :param corrections: Alias -> correct name
+    """
+    def __init__(self, removals, rewrites, corrections):
+        self.removals = list(removals)
+        self.rewrites = list(rewrites)
+        self.corrections = corrections
+        self.removal_set = frozenset(self.removals)
+        # 同一位置能匹配多个去除字符时，与原来按列表顺序 replace 一样优先列表靠前的
+        branches = [re.escape(token) for token in self.removals]
+        # 所有规则合成一个不带命名分组的分支（命名分组会让 re 放弃字面前缀优化，慢两三倍），
+        # 匹配到的文本再按规则顺序找出是哪条规则
+        self.rewrite_rules = []
+        for rule in self.rewrites:
+            pattern = rule['pattern'] if rule.get('regex') else re.escape(rule['pattern'])
+            branches.append(f'(?:{pattern})')
+            self.rewrite_rules.append((re.compile(pattern) if rule.get('regex') else None, rule['pattern'], rule['replace']))
+        self.rule_re = re.compile('|'.join(branches)) if branches else None
+
+    def _replace(self, match):
+        text = match.group()
+        if text in self.removal_set:
+            return ''
+        for compiled, pattern, replace in self.rewrite_rules:
+            if compiled is None:
+                if text == pattern:
+                    return replace
+                continue
+            rule_match = compiled.fullmatch(text)
+            if rule_match:
+                # 规则自身的分组编号从 1 开始，\1 等引用按规则自己的正则展开
+                return rule_match.expand(replace) if '\\' in replace else replace
+        return text
+
+    def clean(self, channel_name):
+        """
+        Remove the tokens and apply the rewrites in a single left-to-right scan.
+        """
+        if self.rule_re is None:
+            return channel_name
+        return self.rule_re.sub(self._replace, channel_name)
+
+    def correct(self, name):
+        return self.corrections.get(name, name)
+
+def load_rules(file_path=RULES_FILE):
+    """
+    Load the rules file; the corrections file path is relative to it.
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        rules = json.load(file)
+    corrections = {}
+    if rules.get('corrections'):
+        corrections = load_corrections_name(os.path.join(os.path.dirname(file_path), rules['corrections']))
+    return NormalizeRules(rules.get('removals', []), rules.get('rewrites', []), corrections)
@@ -0,0 +1,270 @@
+import urllib.request
+import urllib.error
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import namedtuple
+from datetime import datetime, timezone
+import codecs
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+
+# 并发抓取上游源 2026-10-18
+# 所有上游同时下载，单个 host 限制并发连接数，整体设置截止时间；
+# 结果按传入顺序返回，保证后续分发（others.txt 分段顺序）稳定。
+
+headers = {
+    'User-Agent': 'PostmanRuntime-ApipostRuntime/1.1.0',
+}
+
+# 流式下载 2026-10-18
+# 正文按块写入缓存文件（不在内存里保存整个正文），解码时只读开头一段判断编码，
+# 之后逐行解码输出，峰值内存只与单行长度有关。
+CHUNK_SIZE = 64 * 1024
+# 判断编码时读取的开头字节数
+HEAD_SIZE = 64 * 1024
+
+# 下载结果：正文文件路径和sha256
+FetchedBody = namedtuple('FetchedBody', ['path', 'sha256'])
+
+class FetchDeadlineExceeded(Exception):
+    pass
+
+class FetchCacheMiss(Exception):
+    pass
+
+# 上游缓存 2026-10-18
+# 按url保存正文、ETag/Last-Modified和内容哈希；下次请求带上条件头，304时直接用缓存。
+# 正文哈希不变时，解析后的行也直接复用。offline=True时完全不联网，只回放缓存（本地测试用）。
+class FetchCache:
+    def __init__(self, cache_dir, offline=False):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url, suffix):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.{suffix}")
+
+    def _write(self, path, data):
+        # 先写临时文件再替换，避免中途失败留下半个文件
+        tmp_path = f"{path}.tmp{threading.get_ident()}"
+        try:
+            with open(tmp_path, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            remove_quietly(tmp_path)
+            raise
+
+    def load_meta(self, url):
+        try:
+            with open(self._path(url, 'json'), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save_meta(self, url, meta):
+        self._write(self._path(url, 'json'), json.dumps(meta, ensure_ascii=False, indent=1).encode('utf-8'))
+
+    def load_body(self, url):
+        meta = self.load_meta(url)
+        body_path = self._path(url, 'body')
+        if meta is None or not meta.get('sha256') or not os.path.exists(body_path):
+            return None
+        return FetchedBody(body_path, meta['sha256'])
+
+    def conditional_headers(self, url):
+        meta = self.load_meta(url)
+        if self.load_body(url) is None:
+            return {}
+        conditional = {}
+        if meta.get('etag'):
+            conditional['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            conditional['If-Modified-Since'] = meta['last_modified']
+        return conditional
+
+    def store(self, url, response, deadline_at=None):
+        """
+        Stream the response body into the cache chunk by chunk.
+
+        :param deadline_at: time.monotonic() after which the download is abandoned with FetchDeadlineExceeded
+        :return: FetchedBody of the stored body
+        """
+        body_path = self._path(url, 'body')
+        tmp_path = f"{body_path}.tmp{threading.get_ident()}"
+        sha256 = hashlib.sha256()
+        try:
+            with open(tmp_path, 'wb') as file:
+                while True:
+                    # 截止时间过后 fetch_all 已经返回，线程不再继续下载
+                    if deadline_at is not None and time.monotonic() > deadline_at:
+                        raise FetchDeadlineExceeded(f"deadline exceeded while downloading {url}")
+                    chunk = response.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    sha256.update(chunk)
+                    file.write(chunk)
+            os.replace(tmp_path, body_path)
+        except BaseException:
+            remove_quietly(tmp_path)
+            raise
+
+        meta = self.load_meta(url) or {}
+        meta.update({
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'sha256': sha256.hexdigest(),
+            'fetched_at': datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        self.save_meta(url, meta)
+        return FetchedBody(body_path, meta['sha256'])
+
+    def parsed_lines(self, url, body, parser_name, parse):
+        """
+        Yield the lines of parse(iter_lines(body.path)), reusing the cached result when the body hash is unchanged.
+
+        :param body: FetchedBody returned by fetch_all
+        :param parser_name: Distinguishes parsers of different scripts sharing the cache
+        :param parse: Generator function turning decoded lines into parsed lines
+        """
+        meta = self.load_meta(url) or {'url': url}
+        parsed_path = self._path(url, f"{parser_name}.parsed.txt")
+        if meta.get('parsed', {}).get(parser_name) == body.sha256 and os.path.exists(parsed_path):
+            with open(parsed_path, 'r', encoding='utf-8', newline='\n') as file:
+                for line in file:
+                    yield line[:-1]
+            return
+
+        # 边解析边写入缓存，全部解析完成后才登记哈希
+        # 调用方中途出错或不再迭代（GeneratorExit）时删除临时文件
+        tmp_path = f"{parsed_path}.tmp{threading.get_ident()}"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8', newline='\n') as file:
+                for line in parse(iter_lines(body.path)):
+                    file.write(line + '\n')
+                    yield line
+            os.replace(tmp_path, parsed_path)
+        except BaseException:
+            remove_quietly(tmp_path)
+            raise
+        meta = self.load_meta(url) or {'url': url}
+        meta.setdefault('parsed', {})[parser_name] = body.sha256
+        self.save_meta(url, meta)
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+# 根据开头一段字节判断编码：依次尝试 UTF-8、GBK，都失败则用 ISO-8859-1
+def detect_encoding(head, at_eof):
+    for encoding in ('utf-8', 'gbk'):
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            # 开头一段可能截断在多字节字符中间，未到文件尾时不按结尾处理
+            decoder.decode(head, final=at_eof)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return 'iso-8859-1'
+
+def iter_lines(path):
+    """
+    Decode the file once and yield its lines, same as text.split('\\n') but without loading it all.
+    """
+    with open(path, 'rb') as raw:
+        head = raw.read(HEAD_SIZE)
+        encoding = detect_encoding(head, len(head) < HEAD_SIZE)
+        raw.seek(0)
+        # 开头之后出现的非法字节不再整体重新解码，用替换字符处理
+        text = io.TextIOWrapper(raw, encoding=encoding, errors='replace', newline='\n')
+        ended_with_newline = True
+        for line in text:
+            if line.endswith('\n'):
+                yield line[:-1]
+                ended_with_newline = True
+            else:
+                yield line
+                ended_with_newline = False
+        if ended_with_newline:
+            yield ''
+
+def fetch_url(url, timeout=10, cache=None, deadline_at=None):
+    if cache.offline:
+        body = cache.load_body(url)
+        if body is None:
+            raise FetchCacheMiss(f"offline mode, no cache for {url}")
+        return body
+
+    request_headers = dict(headers)
+    request_headers.update(cache.conditional_headers(url))
+    req = urllib.request.Request(url, headers=request_headers)
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return cache.store(url, response, deadline_at)
+    except urllib.error.HTTPError as e:
+        # 304 Not Modified：上游未变化，直接使用缓存
+        if e.code == 304:
+            body = cache.load_body(url)
+            if body is not None:
+                return body
+        raise
+
+def fetch_all(urls, timeout=10, max_workers=16, per_host=6, deadline=120, cache=None, join_stragglers=False):
+    """
+    Fetch all urls concurrently.
+
+    :param urls: List of upstream urls
+    :param timeout: Socket timeout of a single request (seconds)
+    :param max_workers: Total number of worker threads
+    :param per_host: Max concurrent connections to the same host
+    :param deadline: Overall deadline for the whole stage (seconds)
+    :param cache: FetchCache for conditional requests / offline replay; a temporary one is used when None
+    :param join_stragglers: Wait until the downloads still running at the deadline have exited before returning
+        (at most about one more timeout), e.g. before forking worker processes
+    :return: List of (url, FetchedBody, error) in the same order as urls
+    """
+    if cache is None:
+        cache = FetchCache(tempfile.mkdtemp(prefix='iptv-fetch-'))
+
+    host_locks = {}
+    for url in urls:
+        host = urlparse(url).netloc
+        if host not in host_locks:
+            host_locks[host] = threading.BoundedSemaphore(per_host)
+
+    deadline_at = time.monotonic() + deadline
+
+    def task(url):
+        with host_locks[urlparse(url).netloc]:
+            # 排队等待期间可能已经超过截止时间
+            if time.monotonic() > deadline_at:
+                raise FetchDeadlineExceeded(f"deadline {deadline}s exceeded")
+            return fetch_url(url, timeout, cache, deadline_at)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = [executor.submit(task, url) for url in urls]
+    wait(futures, timeout=deadline)
+    # 截止时间到了还没完成的不再等待；正在下载的线程在下一次读取前（最多再等一个 timeout）
+    # 发现超时并删除临时文件退出，解释器退出时不会一直等它们下载完
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    results = []
+    for url, future in zip(urls, futures):
+        if not future.done() or future.cancelled():
+            results.append((url, None, FetchDeadlineExceeded(f"deadline {deadline}s exceeded")))
+        elif future.exception() is not None:
+            results.append((url, None, future.exception()))
+        else:
+            results.append((url, future.result(), None))
+    if join_stragglers:
+        executor.shutdown(wait=True)
+    return results
@@ -0,0 +1,123 @@
+import re
+from collections import namedtuple
+
+# 频道名模糊匹配 2026-10-18
+# 不在任何分类字典里的频道名（others.txt 中约1.2万行）多是字典名加减后缀、前缀的变体，如 "辽宁|辽宁生活"、"TVB娱乐新闻台"。
+# 逐个与字典名算编辑距离是 行数×字典名数，这里对字典名建字符三字组倒排索引，
+# 只与至少共享一个三字组的字典名比较，按 Dice 系数 2*共同三字组/(两者三字组数之和) 取最相似的一个。
+# 置信度高（相似度达到 FUZZY_APPLY_SCORE 且名称中的数字完全一致）的才可以直接归类，其余只写入报告供人工确认，
+# 确认后的变体加到 assets/corrections_name.txt 即可精确匹配。
+
+NGRAM = 3
+# 相似度达到该值才作为候选写入报告
+FUZZY_REVIEW_SCORE = 0.5
+# 相似度达到该值、且数字一致时认为可以直接归类
+FUZZY_APPLY_SCORE = 0.8
+
+# 名称首尾加上边界字符，两个字的频道名也有三字组，且前后缀的差异会体现在相似度里
+BOUNDARY_START = '\x02'
+BOUNDARY_END = '\x03'
+
+digits_re = re.compile(r'\d+')
+
+# name: 原频道名；candidate: 最相似的字典名；score: 相似度；lines: 出现的行数；applied: 是否已按候选归类
+FuzzyMatch = namedtuple('FuzzyMatch', ['name', 'candidate', 'score', 'lines', 'applied'])
+
+def ngrams(name, n=NGRAM):
+    padded = BOUNDARY_START + name + BOUNDARY_END
+    return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+def is_confident(name, candidate, score):
+    """
+    CCTV5/CCTV5+、春晚2020/春晚20 这类只差数字的名称相似度很高但不是同一个频道，数字不同时只报告不归类。
+    """
+    return score >= FUZZY_APPLY_SCORE and digits_re.findall(name) == digits_re.findall(candidate)
+
+class TrigramIndex:
+    """
+    Character n-gram inverted index over the dictionary channel names.
+
+    :param names: Dictionary channel names in match order; on equal similarity the earlier name wins
+    """
+    def __init__(self, names, n=NGRAM):
+        self.n = n
+        self.names = []
+        self.gram_counts = []
+        self.postings = {}
+        for name in names:
+            if not name:
+                continue
+            grams = ngrams(name, n)
+            name_id = len(self.names)
+            self.names.append(name)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(name_id)
+
+    def lookup(self, name, threshold=FUZZY_REVIEW_SCORE):
+        """
+        :return: (dictionary name, similarity) of the most similar name, or None if below threshold
+        """
+        grams = ngrams(name, self.n)
+        shared = {}
+        for gram in grams:
+            for name_id in self.postings.get(gram, ()):
+                shared[name_id] = shared.get(name_id, 0) + 1
+        best_id = None
+        best_score = 0.0
+        for name_id, count in shared.items():
+            score = 2 * count / (len(grams) + self.gram_counts[name_id])
+            if score > best_score or (score == best_score and name_id < best_id):
+                best_id, best_score = name_id, score
+        if best_id is None or best_score < threshold:
+            return None
+        return self.names[best_id], best_score
+
+class FuzzyMatcher:
+    """
+    Look up unmatched names once per distinct name and keep the results for the review report.
+
+    :param category_index: Channel name -> category, as built by categories.load_categories
+    :param apply: Dispatch confident matches to the candidate's category instead of others.txt
+    """
+    def __init__(self, category_index, apply=False):
+        self.category_index = category_index
+        self.index = TrigramIndex(category_index)
+        self.apply = apply
+        self.matches = {}
+        self.line_counts = {}
+
+    def match(self, name):
+        """
+        :return: (channel name, category): the candidate and its category for an applied match,
+            otherwise the original name and None
+        """
+        self.line_counts[name] = self.line_counts.get(name, 0) + 1
+        if name not in self.matches:
+            self.matches[name] = self.index.lookup(name) if name else None
+        result = self.matches[name]
+        if result is not None and self.apply and is_confident(name, *result):
+            return result[0], self.category_index[result[0]]
+        return name, None
+
+    def report(self):
+        """
+        :return: FuzzyMatch list, highest similarity first
+        """
+        matches = []
+        for name, result in self.matches.items():
+            if result is None:
+                continue
+            candidate, score = result
+            applied = self.apply and is_confident(name, candidate, score)
+            matches.append(FuzzyMatch(name, candidate, score, self.line_counts[name], applied))
+        return sorted(matches, key=lambda match: (-match.score, match.name))
+
+    def write_report(self, file_path):
+        matches = self.report()
+        with open(file_path, 'w', encoding='utf-8') as file:
+            file.write("# 频道名,最相似的字典名,相似度,行数,处理（已归类/待确认）\n")
+            for match in matches:
+                action = "已归类" if match.applied else "待确认"
+                file.write(f"{match.name},{match.candidate},{match.score:.2f},{match.lines},{action}\n")
+        return len(matches)
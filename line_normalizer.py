@@ -0,0 +1,50 @@
+import os
+from itertools import islice
+from categories import load_categories
+from channel_name import normalize_channel_name
+
+# 频道行规范化 2026-10-18
+# 把 process_channel_line 中不依赖先后顺序的部分（频道名规范化、url 清理、分类查找）单独拿出来，
+# 可以在 ProcessPoolExecutor 中分块并行执行；去重和分发仍在主进程按原顺序进行，输出与串行完全一致。
+
+# 处理带$的URL，把$之后的内容都去掉（包括$也去掉） 【2024-08-08 22:29:11】
+def clean_url(url):
+    last_dollar_index = url.rfind('$')  # 安全起见找最后一个$处理
+    if last_dollar_index != -1:
+        return url[:last_dollar_index]
+    return url
+
+def normalize_line(line, category_index):
+    """
+    :return: (channel name, channel address, category or None), or None for a line that is not 频道名,url
+    """
+    if "#genre#" not in line and "#EXTINF:" not in line and "," in line and "://" in line:
+        channel_name = normalize_channel_name(line.split(',')[0])  #繁转简、清理特定字符、纠错（带缓存）
+        channel_address = clean_url(line.split(',')[1]).strip()  #把URL中$之后的内容都去掉
+        return channel_name, channel_address, category_index.get(channel_name)
+    return None
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+# 子进程中的分类索引，由 init_worker 建立
+worker_category_index = None
+
+def init_worker(base_dir):
+    global worker_category_index
+    worker_category_index = load_categories(base_dir)[1]
+    # fork 出来的子进程带着主进程的缓存和命中计数，清空后只统计子进程自己的
+    normalize_channel_name.cache_clear()
+
+def normalize_chunk(lines):
+    """
+    :return: (worker pid, cache hits, cache misses, normalized lines); the counts are cumulative per worker
+    """
+    normalized = [normalize_line(line, worker_category_index) for line in lines]
+    info = normalize_channel_name.cache_info()
+    return os.getpid(), info.hits, info.misses, normalized
@@ -0,0 +1,123 @@
+import re
+
+# 直播源单次扫描解析 2026-10-18
+# main.py 和 assets/whitelist-blacklist/main.py 共用。
+# 同时支持 #EXTM3U / #EXTINF 属性、txt 的 #genre# 分组和 频道名,url 行，
+# 逐行输出结构化记录，保留 tvg-id、tvg-logo、group-title 等属性。
+# 两个脚本分发时只用 频道名,url，parse_channel_lines 直接输出这一行，不为每条记录建 PlaylistEntry；
+# 常见的 #EXTINF 行（第一个逗号之前引号成对）和地址行不走正则，比旧的逐行正则转换快约一倍。
+
+# 解析规则变化时修改，使上游缓存里旧的解析结果失效
+PARSER_VERSION = 1
+
+# #EXTINF:-1 tvg-id="x" group-title="y",频道名 —— 名称取引号外的第一个逗号之后
+# 引号外逐个字符匹配，不用嵌套的 + 和 *，引号不成对又没有逗号的行不会回溯成指数时间
+EXTINF_RE = re.compile(r'#EXTINF:(?P<head>(?:[^,"]|"[^"]*")*),(?P<name>.*)')
+# key="value" 形式的属性
+ATTR_RE = re.compile(r'([\w-]+)="([^"]*)"')
+# 地址行 scheme:// 中的 scheme
+SCHEME_RE = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*')
+
+def parse_attrs(head):
+    return dict(ATTR_RE.findall(head))
+
+# 一条频道记录：name 频道名，url 地址，group 分组（group-title 或 #genre#），attrs EXTINF属性
+# 属性只在第一次访问 attrs 时解析，分发时只用到 name/url，不为属性多付开销
+class PlaylistEntry:
+    __slots__ = ('name', 'url', 'group', '_head', '_attrs')
+
+    def __init__(self, name, url, group, head=""):
+        self.name = name
+        self.url = url
+        self.group = group
+        self._head = head
+        self._attrs = None
+
+    @property
+    def attrs(self):
+        if self._attrs is None:
+            self._attrs = parse_attrs(self._head)
+        return self._attrs
+
+    def __repr__(self):
+        return f"PlaylistEntry(name={self.name!r}, url={self.url!r}, group={self.group!r}, attrs={self.attrs!r})"
+
+def group_title(head, default):
+    # 只取 group-title，比解析全部属性快
+    start = head.find('group-title="')
+    if start < 0:
+        return default
+    start += len('group-title="')
+    end = head.find('"', start)
+    return head[start:end] if end >= 0 else default
+
+def parse_extinf(line):
+    """
+    Parse an #EXTINF line.
+
+    :return: (name, attribute text) or None if the line is malformed
+    """
+    if line[7:8] == ':':
+        head, comma, name = line[8:].partition(',')
+        # 第一个逗号之前引号成对，说明逗号不在引号内，与正则结果相同
+        if comma and head.count('"') % 2 == 0:
+            return name.strip(), head
+    match = EXTINF_RE.match(line)
+    if match is None:
+        return None
+    return match.group('name').strip(), match.group('head')
+
+def is_url(line):
+    # 以 scheme:// 开头；scheme 多是 http、rtmp 这类纯字母，不必走正则
+    end = line.find('://')
+    if end <= 0:
+        return False
+    scheme = line[:end]
+    return (scheme.isascii() and scheme.isalpha()) or SCHEME_RE.fullmatch(scheme) is not None
+
+def tokenize(lines):
+    """
+    Single pass tokenizer for m3u and txt playlists.
+
+    :param lines: Iterable of text lines (without line breaks)
+    :return: Generator of (name, url, #EXTINF attribute text or None for txt lines, current #genre# group)
+    """
+    group = ""
+    extinf = None  # 最近一条 #EXTINF 的 (name, attrs)，之后的地址行都归它
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] == '#':
+            if line.startswith("#EXTINF"):
+                extinf = parse_extinf(line)
+            # #EXTM3U 头以及 #EXTVLCOPT 等其他指令直接跳过
+            continue
+        if extinf is not None and is_url(line):
+            yield extinf[0], line, extinf[1], group
+            continue
+        name, comma, url = line.partition(',')
+        if not comma:
+            continue
+        url = url.strip()
+        if url == "#genre#":
+            group = name.strip()
+        elif "://" in url:
+            yield name.strip(), url, None, group
+
+def parse_playlist(lines):
+    """
+    :return: Generator of PlaylistEntry
+    """
+    for name, url, head, group in tokenize(lines):
+        if head is None:
+            yield PlaylistEntry(name, url, group)
+        else:
+            yield PlaylistEntry(name, url, group_title(head, group), head)
+
+def parse_channel_lines(lines):
+    """
+    :return: Generator of "name,url" lines, as dispatched by both scripts
+    """
+    for name, url, _, _ in tokenize(lines):
+        yield f"{name},{url}"
@@ -0,0 +1,71 @@
+import gzip
+import io
+
+# 单次输出 2026-10-18
+# live.txt 和对应的 .m3u 由同一份内存数据一次写出：逐行写入带缓冲的文件，
+# 不再重新读取刚写好的 txt，也不用 += 拼接整个 m3u 文本；可选同时写出 .gz 预压缩副本。
+
+M3U_HEADER = '#EXTM3U x-tvg-url="https://epg.112114.xyz/pp.xml.gz"'
+LOGO_URL = "https://epg.112114.xyz/logo/{}.png"
+BUFFER_SIZE = 1024 * 1024
+
+def m3u_entry(channel_name, channel_url, group_name):
+    logo_url = LOGO_URL.format(channel_name)
+    return (f"#EXTINF:-1  tvg-name=\"{channel_name}\" tvg-logo=\"{logo_url}\"  group-title=\"{group_name}\",{channel_name}\n"
+            f"{channel_url}\n")
+
+def open_text(file_path, gzip_copy=False):
+    """
+    Open a buffered text writer, plus a .gz copy when gzip_copy is set.
+
+    :return: List of writers receiving the same text
+    """
+    writers = [open(file_path, 'w', encoding='utf-8', buffering=BUFFER_SIZE)]
+    if gzip_copy:
+        # mtime=0：内容不变时压缩文件也不变
+        raw = gzip.GzipFile(f"{file_path}.gz", 'wb', mtime=0)
+        writers.append(io.TextIOWrapper(raw, encoding='utf-8', write_through=False))
+    return writers
+
+class PlaylistEmitter:
+    """
+    Write 频道名,url lines to a txt file and, optionally, the matching m3u file in the same pass.
+    The m3u content is the same as the one make_m3u produced from the txt file.
+    """
+    def __init__(self, txt_file, m3u_file=None, gzip_copy=False):
+        self.txt_writers = open_text(txt_file, gzip_copy)
+        self.m3u_writers = open_text(m3u_file, gzip_copy) if m3u_file else []
+        self.group_name = ""
+        self.count = 0
+        self._write(self.m3u_writers, M3U_HEADER + '\n')
+
+    @staticmethod
+    def _write(writers, text):
+        for writer in writers:
+            writer.write(text)
+
+    def write(self, line):
+        self.count += 1
+        self._write(self.txt_writers, line + '\n')
+        if self.m3u_writers:
+            self._write_m3u(line)
+
+    def _write_m3u(self, line):
+        # 与原 make_m3u 一致：只处理恰好一个逗号的行（空行跳过），#genre# 行切换分组
+        parts = line.split(",")
+        if len(parts) != 2:
+            return
+        if "#genre#" in line:
+            self.group_name = parts[0]
+            return
+        self._write(self.m3u_writers, m3u_entry(parts[0], parts[1], self.group_name))
+
+    def close(self):
+        for writer in self.txt_writers + self.m3u_writers:
+            writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
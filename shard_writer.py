@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+
+from playlist_emitter import M3U_HEADER, m3u_entry
+
+# 分类分片输出 2026-10-18
+# 除了完整的 live.txt / live.m3u，每个 #genre# 分类再单独输出一份 txt 和 m3u，
+# 并生成 manifest.json 记录每个分片的 sha256 和大小；客户端只需下载哈希变化的分片。
+# 内容没变的文件不重写，mtime 和 git diff 都保持不变。
+
+SHARD_DIR = 'shards'
+MANIFEST_VERSION = 1
+
+def shard_name(title):
+    # 分类名作为文件名，去掉路径分隔符
+    return title.replace('/', '_').replace('\\', '_')
+
+def render_txt(title, lines):
+    return ''.join([f"{title},#genre#\n"] + [line + '\n' for line in lines]).encode('utf-8')
+
+def render_m3u(title, lines):
+    # 与 PlaylistEmitter 相同：只输出恰好一个逗号的行
+    entries = [m3u_entry(*parts, title) for parts in (line.split(',') for line in lines) if len(parts) == 2]
+    return ''.join([M3U_HEADER + '\n'] + entries).encode('utf-8')
+
+def write_if_changed(file_path, data):
+    """
+    :return: True if the file was (re)written
+    """
+    try:
+        with open(file_path, 'rb') as file:
+            if file.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(data)
+    os.replace(tmp_path, file_path)
+    return True
+
+def write_shards(sections, shard_dir=SHARD_DIR):
+    """
+    Write one txt and one m3u file per category and the manifest.
+
+    :param sections: Iterable of (genre title, 频道名,url lines)
+    :return: (number of files rewritten, number of files unchanged)
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+    manifest_path = os.path.join(shard_dir, 'manifest.json')
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as file:
+            old_files = {entry['path'] for shard in json.load(file)['shards'] for entry in shard['files'].values()}
+    except (FileNotFoundError, ValueError, KeyError, TypeError):
+        old_files = set()
+
+    shards = []
+    written = unchanged = 0
+    for title, lines in sections:
+        files = {}
+        for kind, data in (('txt', render_txt(title, lines)), ('m3u', render_m3u(title, lines))):
+            file_name = f"{shard_name(title)}.{kind}"
+            if write_if_changed(os.path.join(shard_dir, file_name), data):
+                written += 1
+            else:
+                unchanged += 1
+            files[kind] = {'path': file_name, 'sha256': hashlib.sha256(data).hexdigest(), 'size': len(data)}
+        shards.append({'title': title, 'lines': len(lines), 'files': files})
+
+    # 已不存在的分类，删除旧分片
+    new_files = {entry['path'] for shard in shards for entry in shard['files'].values()}
+    for file_name in old_files - new_files:
+        try:
+            os.remove(os.path.join(shard_dir, file_name))
+        except FileNotFoundError:
+            pass
+
+    # manifest 不含时间戳，内容不变时同样不重写
+    manifest = json.dumps({'version': MANIFEST_VERSION, 'shards': shards}, ensure_ascii=False, indent=1)
+    write_if_changed(manifest_path, (manifest + '\n').encode('utf-8'))
+    return written, unchanged
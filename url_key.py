@@ -0,0 +1,71 @@
+import re
+from urllib.parse import quote, urlsplit
+
+# url规范化 2026-10-18
+# 去重原来直接比较url字符串，http://Host:80/x、http://host/x 和带 $ 后缀的同一个地址会被分别检测、分别输出。
+# canonical_url 只用作去重和黑名单查找的键，输出的仍是第一次出现的原始url：
+#   去掉 $ 之后的内容和首尾空白；scheme 和 host 转小写；去掉默认端口；http(s) 的空路径补成 /；
+#   路径和参数中的空白、非ASCII字符转成 %XX，%xx 统一成大写，不需要转义的字符（字母数字和 -._~）解码；
+#   参数按 & 拆开后排序；末尾单独的 # 去掉。
+# 本仓库用 # 连接同一频道的多个地址（a#b），# 之后不为空时保留，不与单独的 a 合并。
+
+DEFAULT_PORTS = {'http': 80, 'https': 443, 'rtsp': 554, 'rtmp': 1935, 'ftp': 21}
+
+# RFC 3986 中不需要转义的字符，%xx 是这些字符时解码
+UNRESERVED = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~')
+# quote 时保留原样的字符：保留字符和 %（已有的转义由 escape_re 统一）；
+# $ 也转义，规范化后的url里不再有 $，再次规范化结果不变
+SAFE_CHARS = "!#&'()*+,/:;=?@[]~%"
+
+escape_re = re.compile(r'%([0-9A-Fa-f]{2})')
+# 已经是规范形式的url（约3/4）：小写的scheme和host、路径只有不需要处理的字符、没有参数；端口另外判断
+simple_url_re = re.compile(r"([a-z]+)://[a-z0-9.\-]+(?::(\d+))?/[A-Za-z0-9\-._~/!'()*+,;=:@]*")
+
+def normalize_escape(match):
+    char = chr(int(match.group(1), 16))
+    return char if char in UNRESERVED else '%' + match.group(1).upper()
+
+def normalize_part(part):
+    return escape_re.sub(normalize_escape, quote(part, safe=SAFE_CHARS))
+
+def strip_dollar(url):
+    # 与 line_normalizer.clean_url 相同：安全起见找最后一个$处理
+    last_dollar_index = url.rfind('$')
+    if last_dollar_index != -1:
+        return url[:last_dollar_index]
+    return url
+
+def canonical_url(url):
+    """
+    :return: The dedupe key of url; urls that cannot be parsed are only stripped
+    """
+    url = strip_dollar(url).strip()
+    simple = simple_url_re.fullmatch(url)
+    if simple and (simple.group(2) is None or int(simple.group(2)) != DEFAULT_PORTS.get(simple.group(1))):
+        return url
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        return url
+    if not parts.scheme or not parts.netloc:
+        return url
+    scheme = parts.scheme.lower()
+    host = parts.hostname or ''
+    if ':' in host:
+        host = f'[{host}]'  # IPv6
+    userinfo = parts.netloc.rpartition('@')[0]
+    netloc = f'{userinfo}@{host}' if userinfo else host
+    if port is not None and port != DEFAULT_PORTS.get(scheme):
+        netloc = f'{netloc}:{port}'
+    path = normalize_part(parts.path)
+    if not path and scheme in ('http', 'https'):
+        path = '/'
+    key = f'{scheme}://{netloc}{path}'
+    if parts.query:
+        params = sorted(normalize_part(param) for param in parts.query.split('&') if param)
+        if params:
+            key += '?' + '&'.join(params)
+    if parts.fragment:
+        key += '#' + normalize_part(parts.fragment)
+    return key
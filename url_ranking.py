@@ -0,0 +1,78 @@
+import os
+import sqlite3
+from itertools import groupby
+from url_key import canonical_url
+
+# 频道内按响应时间排序 2026-10-18
+# 同一个频道的多个url按检测结果排序：最近检测失败的排最后，没有测速数据的排在有数据的后面，
+# 其余按响应时间从快到慢（有检测历史时用EWMA，比单次测速稳定），连续成功次数多的优先；
+# 再按每个频道的上限截断，播放器先试最快的源，列表也更小。
+# 测速结果和检测历史按 canonical_url 查找，检测时记录的写法与输出的写法不同也能对上。
+
+# 无测速数据时的排序值
+UNKNOWN = float('inf')
+
+def load_whitelist_latency(file_path):
+    """
+    Read the checker's whitelist_auto.txt (123.45ms,name,url).
+
+    :return: dict canonical url -> latency in ms
+    """
+    latency = {}
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            for line in file:
+                parts = line.strip().split(',')
+                if len(parts) < 3 or "#genre#" in line or "://" not in line:
+                    continue
+                try:
+                    latency[canonical_url(",".join(parts[2:]))] = float(parts[0].replace("ms", ""))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return latency
+
+def load_probe_history(db_path):
+    """
+    Read the checker's probe history, read-only.
+
+    :return: dict canonical url -> (success_streak, failure_streak, ewma_latency)
+    """
+    if not os.path.exists(db_path):
+        return {}
+    try:
+        db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            return {canonical_url(url): (success_streak, failure_streak, ewma_latency) for url, success_streak, failure_streak, ewma_latency
+                    in db.execute("SELECT url, success_streak, failure_streak, ewma_latency FROM probe_history")}
+        finally:
+            db.close()
+    except sqlite3.Error as e:
+        print(f"读取检测历史失败: {e}")
+        return {}
+
+class UrlRanking:
+    def __init__(self, whitelist_auto_path, history_db_path):
+        self.latency = load_whitelist_latency(whitelist_auto_path)
+        self.history = load_probe_history(history_db_path)
+
+    def sort_key(self, url):
+        url = canonical_url(url)
+        success_streak, failure_streak, ewma_latency = self.history.get(url, (0, 0, None))
+        latency = ewma_latency if ewma_latency is not None else self.latency.get(url, UNKNOWN)
+        return failure_streak > 0, latency, -success_streak
+
+    def rank(self, lines, cap=0):
+        """
+        Sort the urls of each channel fastest first and keep at most cap of them.
+
+        :param lines: 频道名,url lines where lines of the same channel are adjacent
+        :param cap: Max urls per channel, 0 for no limit
+        """
+        ranked = []
+        for _, group in groupby(lines, key=lambda line: line.split(',')[0]):
+            # sorted 是稳定排序，没有数据的url保持原来的顺序
+            group = sorted(group, key=lambda line: self.sort_key(line.split(',', 1)[1]))
+            ranked += group[:cap] if cap else group
+        return ranked
@@ -0,0 +1,119 @@
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from url_key import canonical_url
+
+# url集合快照 2026-10-18
+# 黑名单只增不减，每次启动都把 blacklist_auto.txt 全部读入、拆分、建 set，耗时和内存都随之增长。
+# 检测脚本生成黑名单时同时写一份二进制快照：文件头 + 排序后的 64 位url哈希数组；
+# 生成直播源时 mmap 打开快照并二分查找，不需要解析文本，常驻内存只有实际访问到的页。
+#
+# 文件头（小端）：魔数 8 字节、格式版本 u32、保留 u32、url数 u64、源文件内容哈希 16 字节
+# 源文件内容哈希用于判断快照是否过期（txt 被手工修改、回退或合并后快照不再使用，回退到读文本）。
+# 只比较文件大小时，改动前后大小相同就会误用旧快照；git checkout 会重置 mtime，也不能用来判断。
+# 版本2：哈希的是 canonical_url 规范化后的url，版本1的快照不再使用。
+# 版本3：文件头中的源文件大小换成源文件内容哈希。
+
+MAGIC = b'IPTVURLS'
+VERSION = 3
+HEADER = struct.Struct('<8sIIQ16s')
+DIGEST_SIZE = 16
+READ_SIZE = 1024 * 1024
+ITEM = struct.Struct('<Q')
+
+def key_hash(url_key):
+    return int.from_bytes(hashlib.blake2b(url_key.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def url_hash(url):
+    return key_hash(canonical_url(url))
+
+def file_digest(file_path):
+    """
+    :return: blake2b digest of the file content (2 MB takes a few ms)
+    """
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(READ_SIZE), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+def write_snapshot(file_path, urls, source_digest=b''):
+    """
+    Write the sorted hashes of urls.
+
+    :param source_digest: file_digest of the text file the urls come from, used to detect a stale snapshot
+    """
+    hashes = sorted({url_hash(url) for url in urls})
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, 0, len(hashes), source_digest))
+        file.write(struct.pack(f'<{len(hashes)}Q', *hashes))
+    os.replace(tmp_path, file_path)
+
+class UrlSnapshot:
+    def __init__(self, file_path):
+        with open(file_path, 'rb') as file:
+            self.mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, self.count, self.source_digest = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION or len(self.mm) != HEADER.size + self.count * ITEM.size:
+            self.mm.close()
+            raise ValueError(f"Invalid url snapshot: {file_path}")
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, url):
+        return self.contains_key(canonical_url(url))
+
+    def contains_key(self, url_key):
+        """
+        Membership test for a url that is already a canonical_url key (skips canonicalizing it again).
+        """
+        target = key_hash(url_key)
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            value = ITEM.unpack_from(self.mm, HEADER.size + middle * ITEM.size)[0]
+            if value < target:
+                low = middle + 1
+            elif value > target:
+                high = middle
+            else:
+                return True
+        return False
+
+    def close(self):
+        self.mm.close()
+
+def load_snapshot(file_path, source_path):
+    """
+    Open the snapshot if it exists and was built from the current content of source_path.
+
+    :return: UrlSnapshot or None
+    """
+    try:
+        snapshot = UrlSnapshot(file_path)
+    except (FileNotFoundError, ValueError, struct.error):
+        return None
+    try:
+        source_digest = file_digest(source_path)
+    except OSError:
+        source_digest = None
+    if snapshot.source_digest != source_digest:
+        snapshot.close()
+        return None
+    return snapshot
+
+def read_list_urls(file_path):
+    # 与 main.py 的 read_blacklist_from_txt 相同：取每行第一个逗号后的部分
+    with open(file_path, 'r', encoding='utf-8') as file:
+        return [line.split(',')[1].strip() for line in file if ',' in line]
+
+# 手工重建快照：python url_snapshot.py assets/whitelist-blacklist/blacklist_auto.txt
+if __name__ == "__main__":
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.splitext(source)[0] + '.bin'
+    write_snapshot(target, read_list_urls(source), file_digest(source))
+    print(f"快照已生成: {target}")